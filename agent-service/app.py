@@ -10,6 +10,7 @@ import json
 import traceback
 import os
 import subprocess
+import shutil
 import uuid
 import threading
 import logging
@@ -135,8 +136,7 @@ def run_claude_code(session: AgentSession):
         # Check if claude-code is available (prefer claude-jb which has Grazie auth)
         claude_cmd = None
         for cmd in ['claude-jb', 'claude-code', 'claude']:
-            check = subprocess.run(['which', cmd], capture_output=True, text=True)
-            if check.returncode == 0:
+            if shutil.which(cmd):
                 claude_cmd = cmd
                 break
 
@@ -271,8 +271,7 @@ def run_codex_cli(session: AgentSession):
         # Check if codex is available
         codex_cmd = None
         for cmd in ['codex', 'codex-jb']:
-            check = subprocess.run(['which', cmd], capture_output=True, text=True)
-            if check.returncode == 0:
+            if shutil.which(cmd):
                 codex_cmd = cmd
                 break
 
@@ -409,10 +408,10 @@ def run_git_task(session: AgentSession):
         # Check if claude-code is available (prefer claude-jb which has Grazie auth)
         claude_cmd = None
         for cmd in ['claude-jb', 'claude-code', 'claude']:
-            check = subprocess.run(['which', cmd], capture_output=True, text=True)
-            if check.returncode == 0:
+            cli_path = shutil.which(cmd)
+            if cli_path:
                 claude_cmd = cmd
-                session.add_progress(f"Found CLI: {check.stdout.strip()}")
+                session.add_progress(f"Found CLI: {cli_path}")
                 break
 
         if not claude_cmd:
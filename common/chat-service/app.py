@@ -4,12 +4,16 @@ Universal AI Chat Service for Orca AI Workload Containers
 Provides web-based AI chat through JetBrains AI Platform (Grazie)
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
+import json
 import uuid
 import os
 import platform
+import hashlib
+import threading
+import time
 import requests
 
 app = Flask(__name__)
@@ -27,6 +31,125 @@ GRAZIE_ENDPOINTS = {
     'STAGING': 'https://api.stgn.jetbrains.ai/user/v5/llm'
 }
 
+
+def static_json_prefix(body):
+    """
+    Pre-serialize a static response body so only the timestamp is encoded per request.
+
+    Returns the JSON text with the closing brace replaced by an open
+    "timestamp" member; see timestamped_json_response().
+    """
+    return json.dumps(body)[:-1] + ', "timestamp": "'
+
+
+def timestamped_json_response(prefix):
+    """Complete a static_json_prefix() body with the current timestamp"""
+    return Response(prefix + datetime.utcnow().isoformat() + 'Z"}', mimetype='application/json')
+
+
+HEALTH_JSON_PREFIX = static_json_prefix({
+    'status': 'healthy',
+    'container': os.environ.get('CONTAINER_NAME', 'unknown'),
+    'hostname': platform.node(),
+    'python_version': platform.python_version(),
+    'ai_enabled': True
+})
+
+# Returned by /api/models when the upstream API call fails
+DEFAULT_MODELS_JSON_PREFIX = static_json_prefix({
+    'models': [
+        {
+            'id': 'anthropic/claude-3-5-sonnet-20241022',
+            'name': 'Claude 3.5 Sonnet',
+            'provider': 'Anthropic'
+        },
+        {
+            'id': 'anthropic/claude-3-5-haiku-20241022',
+            'name': 'Claude 3.5 Haiku',
+            'provider': 'Anthropic'
+        },
+        {
+            'id': 'openai/gpt-4o',
+            'name': 'GPT-4o',
+            'provider': 'OpenAI'
+        },
+        {
+            'id': 'openai/gpt-4o-mini',
+            'name': 'GPT-4o Mini',
+            'provider': 'OpenAI'
+        }
+    ]
+})
+
+# Returned by /api/models when the upstream API is unreachable
+NETWORK_ERROR_MODELS_JSON_PREFIX = static_json_prefix({
+    'models': [
+        {
+            'id': 'anthropic/claude-3-5-sonnet-20241022',
+            'name': 'Claude 3.5 Sonnet',
+            'provider': 'Anthropic'
+        },
+        {
+            'id': 'openai/gpt-4o',
+            'name': 'GPT-4o',
+            'provider': 'OpenAI'
+        }
+    ],
+    'note': 'Using default models due to API error'
+})
+
+# Token validation results, keyed by (environment, sha256(token)).
+# Tokens are stable for hours, so frontend polls are answered from here
+# instead of hitting the upstream models endpoint on every page load.
+TOKEN_CACHE_TTL = 300
+TOKEN_CACHE_MAX_SIZE = 10000
+token_cache = {}
+token_cache_lock = threading.Lock()
+# Per-token locks so concurrent validations of the same token share one upstream call
+token_validation_locks = {}
+
+
+def get_cached_token_validation(key):
+    """Return the cached (valid, status_code, details) for a token key, if still fresh"""
+    with token_cache_lock:
+        entry = token_cache.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= time.monotonic():
+            del token_cache[key]
+            return None
+        return result
+
+
+def store_token_validation(key, result):
+    """Cache a token validation result, evicting expired/oldest entries when full"""
+    now = time.monotonic()
+    with token_cache_lock:
+        if len(token_cache) >= TOKEN_CACHE_MAX_SIZE:
+            for stale_key in [k for k, (expires_at, _) in token_cache.items() if expires_at <= now]:
+                del token_cache[stale_key]
+            while len(token_cache) >= TOKEN_CACHE_MAX_SIZE:
+                del token_cache[next(iter(token_cache))]
+        token_cache[key] = (now + TOKEN_CACHE_TTL, result)
+
+
+def token_validation_response(environment, result):
+    """Build the /api/validate_token response from a (valid, status_code, details) result"""
+    valid, status_code, details = result
+    if valid:
+        return jsonify({
+            'valid': True,
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'environment': environment
+        })
+    return jsonify({
+        'valid': False,
+        'error': f'Token validation failed: {status_code}',
+        'details': details
+    }), 401
+
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Simple chat endpoint that echoes messages back"""
@@ -71,14 +194,7 @@ def chat():
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'timestamp': datetime.utcnow().isoformat() + 'Z',
-        'container': os.environ.get('CONTAINER_NAME', 'unknown'),
-        'hostname': platform.node(),
-        'python_version': platform.python_version(),
-        'ai_enabled': True
-    })
+    return timestamped_json_response(HEALTH_JSON_PREFIX)
 
 
 @app.route('/api/chat', methods=['POST'])
@@ -239,31 +355,7 @@ def api_models():
         if not response.ok:
             # Return hardcoded models if API call fails
             print(f"[Models] API call failed, returning defaults")
-            return jsonify({
-                'models': [
-                    {
-                        'id': 'anthropic/claude-3-5-sonnet-20241022',
-                        'name': 'Claude 3.5 Sonnet',
-                        'provider': 'Anthropic'
-                    },
-                    {
-                        'id': 'anthropic/claude-3-5-haiku-20241022',
-                        'name': 'Claude 3.5 Haiku',
-                        'provider': 'Anthropic'
-                    },
-                    {
-                        'id': 'openai/gpt-4o',
-                        'name': 'GPT-4o',
-                        'provider': 'OpenAI'
-                    },
-                    {
-                        'id': 'openai/gpt-4o-mini',
-                        'name': 'GPT-4o Mini',
-                        'provider': 'OpenAI'
-                    }
-                ],
-                'timestamp': datetime.utcnow().isoformat() + 'Z'
-            })
+            return timestamped_json_response(DEFAULT_MODELS_JSON_PREFIX)
 
         # Parse response
         models_data = response.json()
@@ -292,22 +384,7 @@ def api_models():
     except requests.exceptions.RequestException as e:
         print(f"[Models] Network error: {str(e)}")
         # Return defaults on error
-        return jsonify({
-            'models': [
-                {
-                    'id': 'anthropic/claude-3-5-sonnet-20241022',
-                    'name': 'Claude 3.5 Sonnet',
-                    'provider': 'Anthropic'
-                },
-                {
-                    'id': 'openai/gpt-4o',
-                    'name': 'GPT-4o',
-                    'provider': 'OpenAI'
-                }
-            ],
-            'timestamp': datetime.utcnow().isoformat() + 'Z',
-            'note': 'Using default models due to API error'
-        })
+        return timestamped_json_response(NETWORK_ERROR_MODELS_JSON_PREFIX)
     except Exception as e:
         print(f"[Models] Error: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -332,37 +409,55 @@ def validate_token():
         if not token:
             return jsonify({'valid': False, 'error': 'No token provided'}), 400
 
-        # Get the base URL for the environment
-        base_url = GRAZIE_ENDPOINTS.get(environment, GRAZIE_ENDPOINTS['PREPROD'])
+        cache_key = (environment, hashlib.sha256(token.encode()).digest())
+        cached = get_cached_token_validation(cache_key)
+        if cached is not None:
+            return token_validation_response(environment, cached)
 
-        # Try to fetch models to validate token
-        full_url = f"{base_url}/openai/v1/models"
-        headers = {
-            'Grazie-Authenticate-JWT': token
-        }
+        with token_cache_lock:
+            validation_lock = token_validation_locks.setdefault(cache_key, threading.Lock())
 
-        print(f"[Validate] Testing token against {full_url}")
+        try:
+            with validation_lock:
+                # Another request may have validated this token while we waited
+                cached = get_cached_token_validation(cache_key)
+                if cached is not None:
+                    return token_validation_response(environment, cached)
 
-        response = requests.get(
-            full_url,
-            headers=headers,
-            timeout=10
-        )
+                # Get the base URL for the environment
+                base_url = GRAZIE_ENDPOINTS.get(environment, GRAZIE_ENDPOINTS['PREPROD'])
 
-        if response.ok:
-            return jsonify({
-                'valid': True,
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
-                'environment': environment
-            })
-        else:
-            error_text = response.text
-            print(f"[Validate] Token invalid: {response.status_code} - {error_text}")
-            return jsonify({
-                'valid': False,
-                'error': f'Token validation failed: {response.status_code}',
-                'details': error_text
-            }), 401
+                # Try to fetch models to validate token
+                full_url = f"{base_url}/openai/v1/models"
+                headers = {
+                    'Grazie-Authenticate-JWT': token
+                }
+
+                print(f"[Validate] Testing token against {full_url}")
+
+                response = requests.get(
+                    full_url,
+                    headers=headers,
+                    timeout=10
+                )
+
+                if response.ok:
+                    result = (True, response.status_code, None)
+                else:
+                    print(f"[Validate] Token invalid: {response.status_code} - {response.text}")
+                    result = (False, response.status_code, response.text)
+
+                # Only definitive answers are cached; 429s, 5xx and gateway errors
+                # are transient and must not lock a valid token out
+                if response.ok or response.status_code in (401, 403):
+                    store_token_validation(cache_key, result)
+                return token_validation_response(environment, result)
+        finally:
+            with token_cache_lock:
+                # A finished waiter may already have removed ours and a new
+                # request installed a fresh lock; only drop the one we used
+                if token_validation_locks.get(cache_key) is validation_lock:
+                    del token_validation_locks[cache_key]
 
     except requests.exceptions.RequestException as e:
         print(f"[Validate] Network error: {str(e)}")
@@ -6,14 +6,22 @@ Flask web app for Grazie AI client with advanced UI interface
 from flask import Flask, render_template, request, jsonify, Response
 from flask_cors import CORS
 from datetime import datetime
-import json
-import traceback
+import orjson
+import time
+import hashlib
 import base64
+import binascii
+import codecs
+import gzip
+import zlib
 import zipfile
-import tempfile
 import os
 import io
+import tempfile
 import mimetypes
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from grazie_client import GrazieClient
 import logging
@@ -24,6 +32,11 @@ app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size for
 # Enable CORS for all routes to allow requests from the Orca UI
 CORS(app, resources={r"/*": {"origins": "*"}})
 
+# Non-streamed responses of these types are gzipped when the client accepts it
+COMPRESS_MIMETYPES = frozenset({'application/json', 'text/html', 'text/plain'})
+# Bodies smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 256
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +44,134 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# File extensions inside ZIP archives whose contents are forwarded as text
+ZIP_TEXT_EXTENSIONS = {'.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.yml', '.yaml', '.config'}
+# Characters of each ZIP text file included in the chat prompt
+ZIP_PROMPT_TEXT_CHARS = 2000
+# Only the head of each text file ends up in the prompt, so never read more than this per file
+MAX_ZIP_TEXT_BYTES = 8192
+# Prompt text read from one archive; text files past this budget are listed but not read
+MAX_ZIP_TEXT_BUDGET = 200_000
+# Text files read first when an archive exceeds the budget, by lowercased file name prefix
+ZIP_PRIORITY_NAMES = ('readme', 'package.json', 'requirements', 'setup.py', 'docker-compose')
+# Path fragments of generated or vendored files, read last
+ZIP_LOW_PRIORITY_DIRS = ('node_modules/', 'vendor/', 'dist/', 'build/', '.git/', '__pycache__/')
+# Decoded base64 ZIP uploads stay in memory up to this size before spilling to disk
+ZIP_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+# Characters of base64 decoded per chunk; a multiple of 4 so chunks decode independently
+BASE64_DECODE_CHUNK = 4 * 1024 * 1024
+# Threads used to decompress ZIP text members (zlib releases the GIL while inflating)
+ZIP_READ_WORKERS = min(8, os.cpu_count() or 1)
+
+class TTLCache:
+    """Small thread-safe dict cache whose entries expire ttl seconds after being set"""
+    
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+    
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.maxsize:
+                for stale_key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+                    del self._entries[stale_key]
+                # Still full: drop the oldest entries
+                while len(self._entries) >= self.maxsize:
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (now + self.ttl, value)
+    
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+def get_request_json():
+    """
+    Parse the JSON request body with orjson.
+
+    Used by the endpoints that receive base64 file payloads, where body
+    parsing dominates request time. Invalid JSON raises a ValueError.
+    """
+    return orjson.loads(request.get_data(cache=False))
+
+def client_accepts_gzip():
+    """Whether the current request advertises gzip in Accept-Encoding"""
+    return 'gzip' in request.accept_encodings
+
+def gzip_stream(chunks):
+    """Gzip a streamed body, flushing after every chunk so each event reaches the client immediately"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def hash_token(token):
+    """Cache-key form of a JWT token, so raw tokens are never kept as keys"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+# Constructed GrazieClients per (environment, token hash); building one costs several upstream calls
+grazie_clients = TTLCache(maxsize=256, ttl=1800)
+# /api/models responses per (environment, token hash); model availability depends on the token
+models_cache = TTLCache(maxsize=256, ttl=300)
+# Media (vision) support per (environment, model)
+media_support_cache = TTLCache(maxsize=512, ttl=900)
+
+def get_grazie_client(token, environment):
+    """Return a pooled GrazieClient for the token, constructing (and validating) it on first use"""
+    cache_key = (environment, hash_token(token))
+    client = grazie_clients.get(cache_key)
+    if client is None:
+        client = GrazieClient(jwt_token=token, environment=environment)
+        grazie_clients.set(cache_key, client)
+    return client
+
+def discard_grazie_client(token, environment):
+    """Drop a pooled client, e.g. after its token was rejected upstream"""
+    grazie_clients.discard((environment, hash_token(token)))
+
+# Results of process_zip_file per archive content hash; entries hold at most
+# MAX_ZIP_TEXT_BYTES per text file, so keep only a few archives
+zip_analysis_cache = TTLCache(maxsize=32, ttl=600)
+
+# Feature names that indicate vision support, in any capitalization
+VISION_FEATURE_PATTERN = re.compile(r'vision|multimodal|image', re.IGNORECASE)
+# Model ID fragments of models known to accept images, matched against the lowercased ID
+KNOWN_VISION_MODELS = ('anthropic-claude', 'claude', 'gemini', 'gpt-4-vision', 'gpt-4o', 'gpt-4-turbo')
+KNOWN_VISION_MODEL_PATTERN = re.compile('|'.join(map(re.escape, KNOWN_VISION_MODELS)))
+
+@app.after_request
+def compress_response(response):
+    """Gzip complete (non-streamed) text and JSON responses for clients that accept it"""
+    if (response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESS_MIMETYPES
+            or not client_accepts_gzip()):
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    
+    response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -96,7 +237,13 @@ def get_models():
         if not token:
             return jsonify({'error': 'Token is required'}), 400
         
-        client = GrazieClient(jwt_token=token, environment=environment)
+        cache_key = (environment, hash_token(token))
+        model_details = models_cache.get(cache_key)
+        if model_details is not None:
+            logger.info(f"Returning {len(model_details)} cached model details")
+            return jsonify({'models': model_details})
+        
+        client = get_grazie_client(token, environment)
         models = client.get_available_models()
         
         logger.info(f"Found {len(models)} models")
@@ -129,96 +276,245 @@ def get_models():
                     'supports_audio': False
                 })
         
+        models_cache.set(cache_key, model_details)
         logger.info(f"Returning {len(model_details)} model details")
         return jsonify({'models': model_details})
     
     except Exception as e:
-        logger.error(f"Error in get_models: {str(e)}\n{traceback.format_exc()}")
+        logger.error("Error in get_models: %s", e, exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+def read_zip_text(zip_ref, info):
+    """Read and decode at most MAX_ZIP_TEXT_BYTES from the start of a ZIP member"""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    with zip_ref.open(info) as file:
+        # A multi-byte character cut at the read limit is dropped instead of replaced
+        return decoder.decode(file.read(MAX_ZIP_TEXT_BYTES), final=info.file_size <= MAX_ZIP_TEXT_BYTES)
+
+class SharedFileView(io.RawIOBase):
+    """
+    Read-only view of a seekable file that is shared between threads.
+
+    Each view keeps its own position and seeks the underlying file under a
+    lock before every read, so several ZipFile handles can read one
+    archive concurrently even when it cannot be reopened by path.
+    """
+    
+    def __init__(self, file, lock):
+        self._file = file
+        self._lock = lock
+        self._pos = 0
+    
+    def readable(self):
+        return True
+    
+    def seekable(self):
+        return True
+    
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._pos = offset
+        elif whence == os.SEEK_CUR:
+            self._pos += offset
+        else:
+            with self._lock:
+                self._pos = self._file.seek(offset, whence)
+        return self._pos
+    
+    def tell(self):
+        return self._pos
+    
+    def readinto(self, buffer):
+        with self._lock:
+            self._file.seek(self._pos)
+            data = self._file.read(len(buffer))
+        buffer[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+def shared_file_opener(file):
+    """Build an open_archive() callable that hands out independent views of one seekable file"""
+    lock = threading.Lock()
+    return lambda: SharedFileView(file, lock)
+
+def read_zip_texts(open_archive, text_infos):
+    """
+    Read ZIP text members concurrently.
+
+    ZipFile handles are not thread-safe, so every worker thread opens its own
+    handle on the archive via open_archive(). Returns {ZipInfo: text or exception}.
+    """
+    if not text_infos:
+        return {}
+    
+    local = threading.local()
+    handles = []
+    
+    def read(info):
+        zip_ref = getattr(local, 'zip_ref', None)
+        if zip_ref is None:
+            zip_ref = local.zip_ref = zipfile.ZipFile(open_archive(), 'r')
+            handles.append(zip_ref)
+        try:
+            return read_zip_text(zip_ref, info)
+        except Exception as e:
+            return e
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(ZIP_READ_WORKERS, len(text_infos))) as executor:
+            return dict(zip(text_infos, executor.map(read, text_infos)))
+    finally:
+        for zip_ref in handles:
+            zip_ref.close()
+
+def zip_text_priority(info):
+    """Sort key putting READMEs and project manifests first and vendored or build output last"""
+    path = info.filename.lower()
+    name = path.rsplit('/', 1)[-1]
+    if any(fragment in path for fragment in ZIP_LOW_PRIORITY_DIRS):
+        rank = 2
+    elif name.startswith(ZIP_PRIORITY_NAMES):
+        rank = 0
+    else:
+        rank = 1
+    # Shallower files first within a rank
+    return rank, path.count('/')
+
+def analyze_zip_archive(open_archive, max_text_bytes=MAX_ZIP_TEXT_BUDGET):
+    """
+    Extract and analyze the contents of a ZIP archive.
+
+    open_archive() must return a new readable binary file object for the
+    archive on every call (see shared_file_opener). Text files are read
+    until roughly max_text_bytes of prompt text is collected; the rest are
+    reported with type 'skipped'.
+    """
+    with zipfile.ZipFile(open_archive(), 'r') as zip_ref:
+        # Get list of files
+        file_infos = zip_ref.infolist()
+    logger.info(f"ZIP contains {len(file_infos)} items")
+    
+    member_infos = [info for info in file_infos if not info.is_dir()]  # Skip directories
+    # Only text files are read; binary files are described by their size
+    text_candidates = [info for info in member_infos if Path(info.filename).suffix.lower() in ZIP_TEXT_EXTENSIONS]
+    
+    # Pick the most useful text files until the prompt budget is spent
+    text_infos = []
+    budget = max_text_bytes
+    for info in sorted(text_candidates, key=zip_text_priority):
+        if budget <= 0:
+            break
+        text_infos.append(info)
+        budget -= min(info.file_size, ZIP_PROMPT_TEXT_CHARS)
+    
+    if len(text_infos) < len(text_candidates):
+        logger.info(f"Text budget reached: reading {len(text_infos)} of {len(text_candidates)} text files")
+    texts = read_zip_texts(open_archive, text_infos)
+    skipped = set(text_candidates).difference(text_infos)
+    
+    file_contents = {}
+    file_summary = []
+    
+    for info in member_infos:
+        file_path = info.filename
+        text = texts.get(info)
+        if isinstance(text, Exception):
+            logger.warning("Error processing file %s: %s", file_path, text)
+            file_summary.append({
+                'path': file_path,
+                'size': 0,
+                'type': 'error',
+                'error': str(text)
+            })
+            continue
+        
+        if info in skipped:
+            file_type = 'skipped'
+        elif text is None:
+            file_type = 'binary'
+        else:
+            file_type = 'text'
+        
+        if file_type == 'text':
+            file_contents[file_path] = {
+                'type': 'text',
+                'content': text,
+                'size': info.file_size
+            }
+            # Only the first MAX_ZIP_TEXT_BYTES of a member are read
+            if info.file_size > MAX_ZIP_TEXT_BYTES:
+                file_contents[file_path]['truncated'] = True
+        elif file_type == 'binary':
+            file_contents[file_path] = {
+                'type': 'binary',
+                'content': f"Binary file ({info.file_size} bytes)",
+                'size': info.file_size
+            }
+        
+        file_summary.append({
+            'path': file_path,
+            'size': info.file_size,
+            'type': file_type
+        })
+    
+    result = {
+        'file_count': len(file_summary),
+        'total_size': sum(f['size'] for f in file_summary),
+        'file_summary': file_summary,
+        'file_contents': file_contents
+    }
+    
+    logger.info(f"ZIP processing complete: {result['file_count']} files, {result['total_size']} total bytes")
+    return result
+
+def decode_base64_to_file(encoded, file):
+    """Decode base64 text into a binary file chunk by chunk, never holding the whole decoded payload"""
+    try:
+        for start in range(0, len(encoded), BASE64_DECODE_CHUNK):
+            file.write(base64.b64decode(encoded[start:start + BASE64_DECODE_CHUNK], validate=True))
+    except binascii.Error:
+        # Line-wrapped or otherwise non-canonical base64 does not split on chunk boundaries
+        file.seek(0)
+        file.truncate()
+        file.write(base64.b64decode(encoded))
+
 def process_zip_file(file_data):
-    """Extract and analyze ZIP file contents"""
+    """Extract and analyze a base64-encoded ZIP file"""
     try:
         logger.info(f"Processing ZIP file: {file_data['name']}")
         
-        # Decode base64 file content
-        zip_content = base64.b64decode(file_data['content'])
+        encoded = file_data['content']
+        # The same archive is typically sent to /api/analyze_files and then again with each chat message
+        cache_key = hashlib.blake2b(encoded.encode(), digest_size=16).digest()
+        result = zip_analysis_cache.get(cache_key)
+        if result is not None:
+            logger.info(f"Using cached analysis for ZIP file: {file_data['name']}")
+            return result
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as temp_file:
-            temp_file.write(zip_content)
-            temp_file_path = temp_file.name
+        # Small archives stay in memory; larger ones spill to disk while decoding
+        with tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_SIZE, suffix='.zip') as spool:
+            decode_base64_to_file(encoded, spool)
+            result = analyze_zip_archive(shared_file_opener(spool))
         
-        file_contents = {}
-        file_summary = []
-        
-        try:
-            with zipfile.ZipFile(temp_file_path, 'r') as zip_ref:
-                # Get list of files
-                file_list = zip_ref.namelist()
-                logger.info(f"ZIP contains {len(file_list)} items")
-                
-                for file_path in file_list:
-                    if not file_path.endswith('/'):  # Skip directories
-                        try:
-                            # Read file content
-                            with zip_ref.open(file_path) as file:
-                                content = file.read()
-                                
-                                # Try to decode as text for common file types
-                                file_ext = Path(file_path).suffix.lower()
-                                if file_ext in ['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.csv', '.yml', '.yaml', '.config']:
-                                    try:
-                                        text_content = content.decode('utf-8')
-                                        file_contents[file_path] = {
-                                            'type': 'text',
-                                            'content': text_content,
-                                            'size': len(content)
-                                        }
-                                    except UnicodeDecodeError:
-                                        file_contents[file_path] = {
-                                            'type': 'binary',
-                                            'content': f"Binary file ({len(content)} bytes)",
-                                            'size': len(content)
-                                        }
-                                else:
-                                    file_contents[file_path] = {
-                                        'type': 'binary',
-                                        'content': f"Binary file ({len(content)} bytes)",
-                                        'size': len(content)
-                                    }
-                                
-                                file_summary.append({
-                                    'path': file_path,
-                                    'size': len(content),
-                                    'type': file_contents[file_path]['type']
-                                })
-                        except Exception as e:
-                            logger.warning(f"Error processing file {file_path}: {e}")
-                            file_summary.append({
-                                'path': file_path,
-                                'size': 0,
-                                'type': 'error',
-                                'error': str(e)
-                            })
-        finally:
-            # Clean up temporary file
-            os.unlink(temp_file_path)
-        
-        result = {
-            'file_count': len(file_summary),
-            'total_size': sum(f['size'] for f in file_summary),
-            'file_summary': file_summary,
-            'file_contents': file_contents
-        }
-        
-        logger.info(f"ZIP processing complete: {result['file_count']} files, {result['total_size']} total bytes")
+        zip_analysis_cache.set(cache_key, result)
         return result
     
     except Exception as e:
         logger.error(f"Failed to process ZIP file: {e}")
         return {'error': f"Failed to process ZIP file: {str(e)}"}
 
+def process_uploaded_zip_file(file_storage):
+    """Extract and analyze a ZIP file received as a multipart upload"""
+    try:
+        logger.info(f"Processing uploaded ZIP file: {file_storage.filename}")
+        
+        # Werkzeug has already spooled the upload (in memory or on disk), so read it in place
+        return analyze_zip_archive(shared_file_opener(file_storage.stream))
+    
+    except Exception as e:
+        logger.error(f"Failed to process ZIP file: {e}")
+        return {'error': f"Failed to process ZIP file: {str(e)}"}
+
 def prepare_message_with_files(message, files):
     """Prepare message content including file analysis"""
     if not files:
@@ -226,103 +522,168 @@ def prepare_message_with_files(message, files):
         return message
     
     logger.info(f"Preparing message with {len(files)} files")
-    file_analysis = []
+    # Build the whole analysis as a list of fragments and join once at the end
+    parts = []
+    append = parts.append
     
     for file_data in files:
         logger.info(f"Processing file: {file_data['name']} ({file_data['type']}, {file_data.get('size', 0)} bytes)")
         
-        analysis = f"\n\n📎 **File: {file_data['name']}**\n"
-        analysis += f"Type: {file_data['type']}\n"
-        analysis += f"Size: {format_file_size(file_data.get('size', 0))}\n"
+        append(f"\n\n📎 **File: {file_data['name']}**\n")
+        append(f"Type: {file_data['type']}\n")
+        append(f"Size: {format_file_size(file_data.get('size', 0))}\n")
         
         # Handle ZIP files
         if file_data['name'].lower().endswith('.zip'):
             zip_analysis = process_zip_file(file_data)
             if 'error' in zip_analysis:
-                analysis += f"Error: {zip_analysis['error']}\n"
+                append(f"Error: {zip_analysis['error']}\n")
             else:
-                analysis += f"Archive contains {zip_analysis['file_count']} files\n"
-                analysis += f"Total extracted size: {format_file_size(zip_analysis['total_size'])}\n\n"
-                analysis += "📋 **Contents:**\n"
+                append(f"Archive contains {zip_analysis['file_count']} files\n")
+                append(f"Total extracted size: {format_file_size(zip_analysis['total_size'])}\n\n")
+                append("📋 **Contents:**\n")
                 
                 for file_info in zip_analysis['file_summary']:
-                    analysis += f"- {file_info['path']} ({format_file_size(file_info['size'])}) [{file_info['type']}]\n"
+                    append(f"- {file_info['path']} ({format_file_size(file_info['size'])}) [{file_info['type']}]\n")
                 
                 # Include content of text files
                 text_files = {k: v for k, v in zip_analysis['file_contents'].items() if v['type'] == 'text'}
                 if text_files:
-                    analysis += "\n📝 **Text File Contents:**\n"
+                    append("\n📝 **Text File Contents:**\n")
                     for file_path, file_info in text_files.items():
-                        analysis += f"\n--- {file_path} ---\n"
+                        append(f"\n--- {file_path} ---\n")
                         # Limit content length to avoid overwhelming the model
                         content = file_info['content']
-                        if len(content) > 2000:
-                            content = content[:2000] + "\n... (truncated)"
-                        analysis += content + "\n"
-        
-        # Handle image files
-        elif file_data['type'].startswith('image/'):
-            analysis += "📷 **Image Analysis Required**\n"
-            analysis += "I've received an image file. Please analyze this image and provide insights about:\n"
-            analysis += "- Visual content and elements\n"
-            analysis += "- Any text present (OCR)\n"
-            analysis += "- Suggestions for UI/UX improvements if applicable\n"
-            analysis += "- Technical observations about the image\n"
-        
-        # Handle video files
-        elif file_data['type'].startswith('video/'):
-            analysis += "🎬 **Video Analysis Required**\n"
-            analysis += "I've received a video file. Please analyze this video content and provide:\n"
-            analysis += "- Description of visual content\n"
-            analysis += "- Key scenes or moments\n"
-            analysis += "- Testing recommendations if this is a screen recording\n"
-            analysis += "- Technical observations about the video\n"
-        
-        # Handle audio files
-        elif file_data['type'].startswith('audio/'):
-            analysis += "🎵 **Audio Analysis Required**\n"
-            analysis += "I've received an audio file. Please analyze this audio content and provide:\n"
-            analysis += "- Transcription if speech is present\n"
-            analysis += "- Audio quality assessment\n"
-            analysis += "- Content summary and insights\n"
-        
-        # Handle other document types
-        elif file_data['type'] in ['application/pdf', 'text/plain', 'application/msword']:
-            analysis += "📄 **Document Analysis Required**\n"
-            analysis += "I've received a document file. Please analyze the content and provide:\n"
-            analysis += "- Content summary and key points\n"
-            analysis += "- Insights and recommendations\n"
-            analysis += "- Any improvements or suggestions\n"
-        
-        file_analysis.append(analysis)
+                        if len(content) > ZIP_PROMPT_TEXT_CHARS or file_info.get('truncated'):
+                            append(content[:ZIP_PROMPT_TEXT_CHARS])
+                            append("\n... (truncated)")
+                        else:
+                            append(content)
+                        append("\n")
+        
+        # Handle media and document files
+        else:
+            file_type = file_data['type']
+            analysis_block = MEDIA_ANALYSIS_BLOCKS.get(file_type.split('/', 1)[0])
+            if analysis_block is None and file_type in DOCUMENT_TYPES:
+                analysis_block = DOCUMENT_ANALYSIS_BLOCK
+            if analysis_block:
+                append(analysis_block)
     
     # Combine original message with file analysis
-    enhanced_message = message
-    if file_analysis:
-        enhanced_message += "\n\n" + "".join(file_analysis)
-        enhanced_message += "\n\n**Please analyze the uploaded files and provide relevant insights, testing advice, or assistance based on their content.**"
+    enhanced_message = "".join([
+        message,
+        "\n\n",
+        *parts,
+        FILE_ANALYSIS_FOOTER
+    ])
     
     logger.info(f"Enhanced message length: {len(enhanced_message)} characters")
     return enhanced_message
 
+# Analysis instructions appended for media files, by MIME top-level type
+MEDIA_ANALYSIS_BLOCKS = {
+    'image': (
+        "📷 **Image Analysis Required**\n"
+        "I've received an image file. Please analyze this image and provide insights about:\n"
+        "- Visual content and elements\n"
+        "- Any text present (OCR)\n"
+        "- Suggestions for UI/UX improvements if applicable\n"
+        "- Technical observations about the image\n"
+    ),
+    'video': (
+        "🎬 **Video Analysis Required**\n"
+        "I've received a video file. Please analyze this video content and provide:\n"
+        "- Description of visual content\n"
+        "- Key scenes or moments\n"
+        "- Testing recommendations if this is a screen recording\n"
+        "- Technical observations about the video\n"
+    ),
+    'audio': (
+        "🎵 **Audio Analysis Required**\n"
+        "I've received an audio file. Please analyze this audio content and provide:\n"
+        "- Transcription if speech is present\n"
+        "- Audio quality assessment\n"
+        "- Content summary and insights\n"
+    ),
+}
+
+# Document types that get generic analysis instructions
+DOCUMENT_TYPES = frozenset({'application/pdf', 'text/plain', 'application/msword'})
+DOCUMENT_ANALYSIS_BLOCK = (
+    "📄 **Document Analysis Required**\n"
+    "I've received a document file. Please analyze the content and provide:\n"
+    "- Content summary and key points\n"
+    "- Insights and recommendations\n"
+    "- Any improvements or suggestions\n"
+)
+
+# Closing instruction appended after all file analyses
+FILE_ANALYSIS_FOOTER = "\n\n**Please analyze the uploaded files and provide relevant insights, testing advice, or assistance based on their content.**"
+
+# MIME top-level types reported by /api/analyze_files
+MULTIMEDIA_TYPES = frozenset({'image', 'video', 'audio'})
+SUPPORTED_MEDIA_TYPES = MULTIMEDIA_TYPES | {'text'}
+
+def sse_event(payload):
+    """Encode a payload as one server-sent event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+# Final event of every /api/chat stream
+SSE_DONE_FRAME = sse_event({'done': True})
+
+FILE_SIZE_UNITS = ("B", "KB", "MB", "GB")
+
 def format_file_size(bytes_size):
     """Format file size in human readable format"""
     if bytes_size == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB"]
-    i = 0
-    while bytes_size >= 1024 and i < len(size_names) - 1:
-        bytes_size /= 1024.0
-        i += 1
+    # Each unit is 2**10 times the previous one, so the bit length picks it directly
+    i = min((max(int(bytes_size), 1).bit_length() - 1) // 10, len(FILE_SIZE_UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * i)):.1f} {FILE_SIZE_UNITS[i]}"
+
+def check_model_supports_media(client, model):
+    """Check whether a model accepts media (vision) messages, caching the result per environment"""
+    cache_key = (client.environment, model)
+    cached = media_support_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    model_supports_media = False
+    try:
+        capabilities = client.get_model_capabilities(model)
+        features = capabilities.get('features', [])
+        
+        # Debug: Log all capabilities
+        logger.info(f"Model {model} capabilities: {capabilities}")
+        logger.info(f"Model {model} features: {features}")
+        
+        # Check for vision support - try different possible feature names
+        model_supports_media = any(VISION_FEATURE_PATTERN.search(str(feature)) for feature in features)
+        
+        # Also check if it's a known vision model
+        if KNOWN_VISION_MODEL_PATTERN.search(model.lower()):
+            model_supports_media = True
+            logger.info(f"Model {model} identified as known vision model")
+        
+        logger.info(f"Model {model} supports media: {model_supports_media}")
+        
+    except Exception as e:
+        logger.warning(f"Could not check capabilities for {model}: {e}")
+        # Default to True for known vision models if capability check fails
+        if KNOWN_VISION_MODEL_PATTERN.search(model.lower()):
+            model_supports_media = True
+            logger.info(f"Defaulting to vision support for known model: {model}")
     
-    return f"{bytes_size:.1f} {size_names[i]}"
+    media_support_cache.set(cache_key, model_supports_media)
+    return model_supports_media
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Enhanced chat endpoint with proper Grazie API file attachment support via LLMChatMediaMessage"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         token = data.get('token')
         environment = data.get('environment', 'staging')
         model = data.get('model')
@@ -342,7 +703,8 @@ def chat():
         logger.info(f"Stream enabled: {stream}")
         logger.info(f"Parameters: {parameters}")
         
-        if files:
+        # Per-item logs are only formatted when INFO is enabled
+        if files and logger.isEnabledFor(logging.INFO):
             for i, file_data in enumerate(files):
                 logger.info(f"  File {i+1}: {file_data.get('name', 'unknown')} ({file_data.get('type', 'unknown')}, {file_data.get('size', 0)} bytes)")
         
@@ -351,7 +713,7 @@ def chat():
             return jsonify({'error': 'Token, model, and message are required'}), 400
         
         try:
-            client = GrazieClient(jwt_token=token, environment=environment)
+            client = get_grazie_client(token, environment)
         except Exception as e:
             logger.error(f"Failed to create Grazie client: {e}")
             return jsonify({'error': f'Failed to initialize client: {str(e)}'}), 500
@@ -377,38 +739,7 @@ def chat():
         })
         
         # Check if model supports media/vision before adding file attachments
-        model_supports_media = False
-        try:
-            capabilities = client.get_model_capabilities(model)
-            features = capabilities.get('features', [])
-            
-            # Debug: Log all capabilities
-            logger.info(f"Model {model} capabilities: {capabilities}")
-            logger.info(f"Model {model} features: {features}")
-            
-            # Check for vision support - try different possible feature names
-            vision_indicators = ['Vision', 'vision', 'Multimodal', 'multimodal', 'Image', 'image']
-            model_supports_media = any(indicator in str(features) for indicator in vision_indicators)
-            
-            # Also check if it's a known vision model
-            known_vision_models = [
-                'anthropic-claude', 'claude', 'gemini', 'gpt-4-vision', 'gpt-4o', 'gpt-4-turbo'
-            ]
-            if any(known_model in model.lower() for known_model in known_vision_models):
-                model_supports_media = True
-                logger.info(f"Model {model} identified as known vision model")
-            
-            logger.info(f"Model {model} supports media: {model_supports_media}")
-            
-        except Exception as e:
-            logger.warning(f"Could not check capabilities for {model}: {e}")
-            # Default to True for known vision models if capability check fails
-            known_vision_models = [
-                'anthropic-claude', 'claude', 'gemini', 'gpt-4-vision', 'gpt-4o', 'gpt-4-turbo'
-            ]
-            if any(known_model in model.lower() for known_model in known_vision_models):
-                model_supports_media = True
-                logger.info(f"Defaulting to vision support for known model: {model}")
+        model_supports_media = check_model_supports_media(client, model)
         
         # Add file attachments only for models that support media
         if files:
@@ -438,9 +769,11 @@ def chat():
                     # Update the user message
                     messages[-1]["content"] = enhanced_message
         
-        logger.info(f"Final messages array: {len(messages)} messages")
-        for i, msg in enumerate(messages):
-            logger.info(f"  Message {i+1}: {msg.get('type')} - {len(str(msg.get('content', msg.get('data', ''))))} chars")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Final messages array: {len(messages)} messages")
+            for i, msg in enumerate(messages):
+                # Media messages carry base64 'data' instead of 'content'; both are already strings
+                logger.info(f"  Message {i+1}: {msg.get('type')} - {len(msg.get('content') or '') + len(msg.get('data') or '')} chars")
         
         if stream:
             def generate():
@@ -452,45 +785,49 @@ def chat():
                     for chunk in client.chat_stream(messages, model, parameters):
                         chunk_count += 1
                         if chunk.get("type") == "Content":
-                            yield f"data: {json.dumps({'content': chunk.get('content', '')})}\n\n"
+                            yield sse_event({'content': chunk.get('content', '')})
                         elif chunk.get("type") == "FinishMetadata":
                             logger.info(f"Stream finished for {model} after {chunk_count} chunks")
-                            yield f"data: {json.dumps({'finish_reason': chunk.get('reason')})}\n\n"
+                            yield sse_event({'finish_reason': chunk.get('reason')})
                         elif chunk.get("type") == "QuotaMetadata":
-                            yield f"data: {json.dumps({'quota': chunk})}\n\n"
+                            yield sse_event({'quota': chunk})
                     
-                    yield f"data: {json.dumps({'done': True})}\n\n"
+                    yield SSE_DONE_FRAME
                 
                 except Exception as e:
-                    logger.error(f"Streaming error for model {model}: {str(e)}\n{traceback.format_exc()}")
-                    yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                    logger.error("Streaming error for model %s: %s", model, e, exc_info=True)
+                    if "401" in str(e) or "Unauthorized" in str(e):
+                        discard_grazie_client(token, environment)
+                    yield sse_event({'error': str(e)})
             
             logger.info(f"Returning streaming response for model: {model}")
-            return Response(generate(), mimetype='text/plain', headers={
+            headers = {
                 'Cache-Control': 'no-cache',
                 'Connection': 'keep-alive',
                 'Access-Control-Allow-Origin': '*'
-            })
+            }
+            body = generate()
+            if client_accepts_gzip():
+                body = gzip_stream(body)
+                headers['Content-Encoding'] = 'gzip'
+                headers['Vary'] = 'Accept-Encoding'
+            return Response(body, mimetype='text/event-stream', headers=headers)
         else:
             # Non-streaming response
             try:
                 logger.info(f"Starting non-streaming response for model: {model}")
                 
                 # Use chat_complete with messages containing media messages
-                content_parts = []
-                for chunk in client.chat_stream(messages, model, parameters):
-                    if chunk.get("type") == "Content":
-                        content_parts.append(chunk.get("content", ""))
-                
-                response = "".join(content_parts)
+                response = client.chat_complete(messages, model, parameters)
                 logger.info(f"Non-streaming response completed for model: {model}")
                 return jsonify({'response': response})
             except Exception as e:
                 error_msg = str(e)
-                logger.error(f"Non-streaming error for model {model}: {error_msg}\n{traceback.format_exc()}")
+                logger.error("Non-streaming error for model %s: %s", model, error_msg, exc_info=True)
 
                 # Provide more helpful error messages
                 if "401" in error_msg or "Unauthorized" in error_msg:
+                    discard_grazie_client(token, environment)
                     error_msg = "Authentication failed. Please check your Grazie token is valid and not expired."
                 elif "403" in error_msg or "Forbidden" in error_msg:
                     error_msg = f"Access denied for model '{model}'. Your token may not have permission to use this model."
@@ -508,7 +845,7 @@ def chat():
         return jsonify({'error': error_msg}), 400
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Chat endpoint error: {error_msg}\n{traceback.format_exc()}")
+        logger.error("Chat endpoint error: %s", error_msg, exc_info=True)
 
         # Provide more helpful error messages
         if "401" in error_msg or "Unauthorized" in error_msg:
@@ -522,11 +859,20 @@ def chat():
     finally:
         logger.info(f"=== CHAT REQUEST END ===")
 
+def analyze_file_type(file_type):
+    """Describe whether a non-archive file type is supported for analysis"""
+    media_type = file_type.split('/', 1)[0]
+    
+    return {
+        'supported': media_type in SUPPORTED_MEDIA_TYPES or file_type == 'application/pdf',
+        'file_type': 'multimedia' if media_type in MULTIMEDIA_TYPES else 'document'
+    }
+
 @app.route('/api/analyze_files', methods=['POST'])
 def analyze_files():
     """Dedicated endpoint for file analysis"""
     try:
-        data = request.get_json()
+        data = get_request_json()
         files = data.get('files', [])
         
         logger.info(f"Analyzing {len(files)} files")
@@ -548,14 +894,7 @@ def analyze_files():
                 zip_analysis = process_zip_file(file_data)
                 result['analysis'] = zip_analysis
             else:
-                # Check if file type is supported
-                supported_types = ['image/', 'video/', 'audio/', 'text/', 'application/pdf']
-                is_supported = any(file_data['type'].startswith(t) for t in supported_types)
-                
-                result['analysis'] = {
-                    'supported': is_supported,
-                    'file_type': 'multimedia' if file_data['type'].startswith(('image/', 'video/', 'audio/')) else 'document'
-                }
+                result['analysis'] = analyze_file_type(file_data['type'])
             
             analysis_results.append(result)
         
@@ -565,6 +904,51 @@ def analyze_files():
         logger.error(f"File analysis error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/upload_files', methods=['POST'])
+def upload_files():
+    """
+    File analysis endpoint for multipart/form-data uploads ("files" fields).
+
+    Unlike /api/analyze_files, uploads are not base64-encoded inside JSON:
+    Werkzeug spools them to disk while parsing, so large archives are never
+    held in memory as a whole.
+    """
+    try:
+        files = request.files.getlist('files')
+        
+        logger.info(f"Analyzing {len(files)} uploaded files")
+        
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+        
+        analysis_results = []
+        
+        for file_storage in files:
+            file_type = file_storage.mimetype or mimetypes.guess_type(file_storage.filename)[0] or 'application/octet-stream'
+            file_storage.stream.seek(0, os.SEEK_END)
+            file_size = file_storage.stream.tell()
+            file_storage.stream.seek(0)
+            
+            result = {
+                'name': file_storage.filename,
+                'type': file_type,
+                'size': file_size
+            }
+            
+            # Handle ZIP files
+            if file_storage.filename.lower().endswith('.zip'):
+                result['analysis'] = process_uploaded_zip_file(file_storage)
+            else:
+                result['analysis'] = analyze_file_type(file_type)
+            
+            analysis_results.append(result)
+        
+        return jsonify({'files': analysis_results})
+    
+    except Exception as e:
+        logger.error(f"File upload analysis error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/validate_token', methods=['POST'])
 def validate_token():
     """Validate JWT token for the specified environment"""
@@ -578,13 +962,18 @@ def validate_token():
         if not token:
             return jsonify({'valid': False, 'error': 'Token is required'}), 400
         
+        # Always check upstream: a pooled client may outlive its token's revocation.
+        # The fresh client replaces the pooled one, so other endpoints pick it up.
+        discard_grazie_client(token, environment)
         try:
             client = GrazieClient(jwt_token=token, environment=environment)
-            logger.info("Token validation successful")
-            return jsonify({'valid': True, 'chat_available': client.is_chat_available()})
         except ValueError as e:
             logger.warning(f"Token validation failed: {e}")
             return jsonify({'valid': False, 'error': str(e)})
+        
+        grazie_clients.set((environment, hash_token(token)), client)
+        logger.info("Token validation successful")
+        return jsonify({'valid': True, 'chat_available': client.is_chat_available()})
     
     except Exception as e:
         logger.error(f"Token validation error: {str(e)}")
@@ -597,7 +986,7 @@ def too_large(e):
 
 @app.errorhandler(Exception)
 def handle_exception(e):
-    logger.error(f"Unhandled exception: {str(e)}\n{traceback.format_exc()}")
+    logger.error("Unhandled exception: %s", e, exc_info=True)
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
@@ -5,8 +5,9 @@ and the new SDK-based client with Sonnet 4 support.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from grazie_client import GrazieClient
-from grazie_sdk_client import GrazieSDKClient
+from grazie_sdk_client import get_shared_client
 
 
 def demo_original_client():
@@ -60,30 +61,59 @@ def demo_sdk_client():
     
     try:
         # Initialize the SDK client
-        client = GrazieSDKClient(environment="staging")
+        client = get_shared_client(environment="staging")
         
         # Show available models
         print("Available models:")
         for model in client.get_available_models():
             print(f"  - {model}")
         
-        # Simple chat with default Sonnet 4
-        print("\n--- Simple Chat with Sonnet 4 ---")
-        response = client.simple_chat(
-            user_message="Hello, how are you?",
-            system_message="You are a helpful assistant."
-        )
-        print(f"Response: {response}")
+        # The non-streaming requests are independent, so run them concurrently
+        # and print the results in order once each one is ready
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            simple_future = executor.submit(
+                client.simple_chat,
+                user_message="Hello, how are you?",
+                system_message="You are a helpful assistant."
+            )
+            sonnet4_future = executor.submit(
+                client.sonnet4_chat,
+                user_message="Explain quantum computing in simple terms.",
+                system_message="You are a physics teacher explaining complex topics simply."
+            )
+            deterministic_params = client.create_deterministic_params(seed=123)
+            deterministic_future = executor.submit(
+                client.sonnet4_chat,
+                user_message="Generate a random number between 1 and 10.",
+                parameters=deterministic_params
+            )
+            metadata_future = executor.submit(
+                client.chat_stream_with_metadata,
+                messages=[
+                    {"type": "system", "content": "You are a helpful assistant."},
+                    {"type": "user", "content": "What's the capital of France?"}
+                ]
+            )
+            
+            # Simple chat with default Sonnet 4
+            print("\n--- Simple Chat with Sonnet 4 ---")
+            print(f"Response: {simple_future.result()}")
+            
+            # Using the specialized Sonnet 4 method
+            print("\n--- Sonnet 4 Specific Method ---")
+            print(f"Sonnet 4 response: {sonnet4_future.result()}")
+            
+            # With parameters
+            print("\n--- Deterministic Response ---")
+            print(f"Deterministic response: {deterministic_future.result()}")
+            
+            # Chat with metadata
+            print("\n--- Chat with Metadata ---")
+            content, metadata = metadata_future.result()
+            print(f"Response: {content}")
+            print(f"Metadata: {metadata}")
         
-        # Using the specialized Sonnet 4 method
-        print("\n--- Sonnet 4 Specific Method ---")
-        response = client.sonnet4_chat(
-            user_message="Explain quantum computing in simple terms.",
-            system_message="You are a physics teacher explaining complex topics simply."
-        )
-        print(f"Sonnet 4 response: {response}")
-        
-        # Streaming with Sonnet 4
+        # Streaming with Sonnet 4 runs last so its output prints live
         print("\n--- Streaming with Sonnet 4 ---")
         print("Streaming response:")
         for chunk in client.sonnet4_stream(
@@ -94,26 +124,6 @@ def demo_sdk_client():
                 print(chunk.get("content", ""), end="", flush=True)
         print()  # New line after streaming
         
-        # With parameters
-        print("\n--- Deterministic Response ---")
-        deterministic_params = client.create_deterministic_params(seed=123)
-        response = client.sonnet4_chat(
-            user_message="Generate a random number between 1 and 10.",
-            parameters=deterministic_params
-        )
-        print(f"Deterministic response: {response}")
-        
-        # Chat with metadata
-        print("\n--- Chat with Metadata ---")
-        content, metadata = client.chat_stream_with_metadata(
-            messages=[
-                {"type": "system", "content": "You are a helpful assistant."},
-                {"type": "user", "content": "What's the capital of France?"}
-            ]
-        )
-        print(f"Response: {content}")
-        print(f"Metadata: {metadata}")
-        
     except Exception as e:
         print(f"SDK Client Error: {e}")
         print("Make sure you have installed the grazie_api_gateway_client package:")
@@ -127,20 +137,29 @@ def compare_clients():
     question = "What are the main benefits of using renewable energy?"
     
     try:
-        # Original client
-        print("Original Client (GPT-4o):")
-        original_client = GrazieClient(environment="staging")
-        original_response = original_client.simple_chat(
-            user_message=question,
-            profile="openai-gpt-4o"
-        )
-        print(f"Response: {original_response[:200]}...")
+        def ask_original():
+            original_client = GrazieClient(environment="staging")
+            return original_client.simple_chat(
+                user_message=question,
+                profile="openai-gpt-4o"
+            )
+        
+        def ask_sdk():
+            sdk_client = get_shared_client(environment="staging")
+            return sdk_client.sonnet4_chat(user_message=question)
         
-        # SDK client with Sonnet 4
-        print("\nSDK Client (Sonnet 4):")
-        sdk_client = GrazieSDKClient(environment="staging")
-        sdk_response = sdk_client.sonnet4_chat(user_message=question)
-        print(f"Response: {sdk_response[:200]}...")
+        # Both clients answer at the same time
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            original_future = executor.submit(ask_original)
+            sdk_future = executor.submit(ask_sdk)
+            
+            # Original client
+            print("Original Client (GPT-4o):")
+            print(f"Response: {original_future.result()[:200]}...")
+            
+            # SDK client with Sonnet 4
+            print("\nSDK Client (Sonnet 4):")
+            print(f"Response: {sdk_future.result()[:200]}...")
         
     except Exception as e:
         print(f"Comparison failed: {e}")
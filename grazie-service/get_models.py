@@ -2,7 +2,7 @@
 
 import os
 import sys
-import json
+import orjson
 from grazie_client import GrazieClient
 
 def main():
@@ -19,7 +19,7 @@ def main():
             "error": "JWT token required. Provide via GRAZIE_JWT_TOKEN environment variable or command line argument.",
             "models": []
         }
-        print(json.dumps(error_response), file=sys.stderr)
+        sys.stderr.buffer.write(orjson.dumps(error_response) + b"\n")
         sys.exit(1)
     
     try:
@@ -29,38 +29,32 @@ def main():
         # Get available models
         models = client.get_available_models()
         
+        # Capabilities arrive with the single profiles request made by the
+        # client constructor, so read them straight from that map rather than
+        # issuing (or threading) one lookup per model
+        capabilities_map = client.model_capabilities
+        
         # Format for CodeCanvas integration
         models_list = []
         for model in models:
-            try:
-                capabilities = client.get_model_capabilities(model)
-                models_list.append({
-                    "name": model,
-                    "id": model,
-                    "provider": capabilities.get("provider", "Grazie"),
-                    "features": capabilities.get("features", ["chat"]),
-                    "context_limit": capabilities.get("context_limit", 0),
-                    "contextLimit": capabilities.get("context_limit", 0),
-                    "max_output_tokens": capabilities.get("max_output_tokens", 0),
-                    "maxOutputTokens": capabilities.get("max_output_tokens", 0),
-                    "display_name": model.replace("-", " ").title()
-                })
-            except:
-                # If capabilities fail, still include basic model info
-                models_list.append({
-                    "name": model,
-                    "id": model,
-                    "provider": "Grazie",
-                    "features": ["chat"],
-                    "context_limit": 0,
-                    "contextLimit": 0,
-                    "max_output_tokens": 0,
-                    "maxOutputTokens": 0,
-                    "display_name": model.replace("-", " ").title()
-                })
+            # Models without capabilities still get the basic defaults
+            capabilities = capabilities_map.get(model, {})
+            context_limit = capabilities.get("context_limit", 0)
+            max_output_tokens = capabilities.get("max_output_tokens", 0)
+            models_list.append({
+                "name": model,
+                "id": model,
+                "provider": capabilities.get("provider", "Grazie"),
+                "features": capabilities.get("features", ["chat"]),
+                "context_limit": context_limit,
+                "contextLimit": context_limit,
+                "max_output_tokens": max_output_tokens,
+                "maxOutputTokens": max_output_tokens,
+                "display_name": model.replace("-", " ").title()
+            })
         
         # Output JSON for CodeCanvas to parse
-        print(json.dumps(models_list, indent=2))
+        sys.stdout.buffer.write(orjson.dumps(models_list, option=orjson.OPT_INDENT_2) + b"\n")
         
     except Exception as e:
         # Output error in JSON format that CodeCanvas can handle
@@ -68,7 +62,7 @@ def main():
             "error": str(e),
             "models": []
         }
-        print(json.dumps(error_response), file=sys.stderr)
+        sys.stderr.buffer.write(orjson.dumps(error_response) + b"\n")
         sys.exit(1)
 
 if __name__ == "__main__":
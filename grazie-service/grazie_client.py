@@ -21,9 +21,24 @@ class GrazieClient:
         "production": "/user/v5/llm/chat/stream/v8"
     }
     
+    # Sampling presets for create_creative_params / create_focused_params
+    _CREATIVE_PARAMS = {
+        "low": {'temperature': 0.7, 'top_p': 0.8},
+        "medium": {'temperature': 1.0, 'top_p': 0.9},
+        "high": {'temperature': 1.3, 'top_p': 0.95}
+    }
+    
+    _FOCUSED_PARAMS = {
+        "low": {'temperature': 0.8, 'top_k': 40},
+        "medium": {'temperature': 0.6, 'top_k': 20},
+        "high": {'temperature': 0.3, 'top_k': 10}
+    }
+    
     def __init__(self, jwt_token: Optional[str] = None, environment: str = "staging"):
         self.jwt_token = jwt_token or os.getenv('USER_JWT_TOKEN') or os.getenv('GRAZIE_JWT_TOKEN')
         self.environment = environment
+        # One session per client so repeated calls reuse keep-alive connections
+        self.session = requests.Session()
         self.base_url = self._discover_endpoint()
         self.profiles = {}
         self.model_capabilities = {}
@@ -32,8 +47,8 @@ class GrazieClient:
         if not self.jwt_token:
             raise ValueError("JWT token required")
         
-        self._validate_token()
-        self._load_profiles()
+        # The profiles response both validates the token and lists the models
+        self._load_profiles(self._validate_token())
         self._test_chat_availability()
     
     def _discover_endpoint(self) -> str:
@@ -42,7 +57,7 @@ class GrazieClient:
             return self.FALLBACK_ENDPOINTS.get(self.environment, self.FALLBACK_ENDPOINTS["staging"])
         
         try:
-            response = requests.get(config_url, timeout=10)
+            response = self.session.get(config_url, timeout=10)
             response.raise_for_status()
             config = response.json()
             
@@ -68,9 +83,10 @@ class GrazieClient:
         
         return self.FALLBACK_ENDPOINTS.get(self.environment, self.FALLBACK_ENDPOINTS["staging"])
     
-    def _validate_token(self):
+    def _validate_token(self) -> requests.Response:
+        """Validate the token against the profiles endpoint and return its response."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/user/v5/llm/profiles",
                 headers=self._get_headers(),
                 timeout=10
@@ -82,14 +98,16 @@ class GrazieClient:
             if "401" in str(e):
                 raise ValueError("Invalid or expired JWT token")
             raise ValueError(f"Token validation failed: {e}")
+        return response
     
-    def _load_profiles(self):
-        response = requests.get(
-            f"{self.base_url}/user/v5/llm/profiles",
-            headers=self._get_headers(),
-            timeout=10
-        )
-        response.raise_for_status()
+    def _load_profiles(self, response: Optional[requests.Response] = None):
+        if response is None:
+            response = self.session.get(
+                f"{self.base_url}/user/v5/llm/profiles",
+                headers=self._get_headers(),
+                timeout=10
+            )
+            response.raise_for_status()
         
         data = response.json()
         # Handle both direct list and {"profiles": [...]} formats
@@ -194,7 +212,7 @@ class GrazieClient:
         print(f"DEBUG: Profile: {profile}")
         print(f"DEBUG: Payload: {json.dumps(payload, indent=2)}")
         
-        response = requests.post(
+        response = self.session.post(
             url,
             headers=self._get_headers(),
             json=payload,
@@ -318,14 +336,12 @@ class GrazieClient:
         Args:
             creativity_level: "low", "medium", or "high"
         """
-        if creativity_level == "low":
-            return {'temperature': 0.7, 'top_p': 0.8}
-        elif creativity_level == "medium":
-            return {'temperature': 1.0, 'top_p': 0.9}
-        elif creativity_level == "high":
-            return {'temperature': 1.3, 'top_p': 0.95}
-        else:
-            raise ValueError("creativity_level must be 'low', 'medium', or 'high'")
+        try:
+            preset = self._CREATIVE_PARAMS[creativity_level]
+        except KeyError:
+            raise ValueError("creativity_level must be 'low', 'medium', or 'high'") from None
+        # Copy so callers can tweak the result without changing the preset
+        return dict(preset)
 
     def create_focused_params(self, focus_level: str = "medium") -> Dict[str, Any]:
         """Create parameters for focused/deterministic output.
@@ -333,14 +349,11 @@ class GrazieClient:
         Args:
             focus_level: "low", "medium", or "high"
         """
-        if focus_level == "low":
-            return {'temperature': 0.8, 'top_k': 40}
-        elif focus_level == "medium":
-            return {'temperature': 0.6, 'top_k': 20}
-        elif focus_level == "high":
-            return {'temperature': 0.3, 'top_k': 10}
-        else:
-            raise ValueError("focus_level must be 'low', 'medium', or 'high'")
+        try:
+            preset = self._FOCUSED_PARAMS[focus_level]
+        except KeyError:
+            raise ValueError("focus_level must be 'low', 'medium', or 'high'") from None
+        return dict(preset)
 
     def create_json_response_params(self) -> Dict[str, Any]:
         """Create parameters to ensure JSON response format."""
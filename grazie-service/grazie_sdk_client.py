@@ -1,12 +1,177 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import io
+import json
 import os
-from typing import Dict, List, Optional, Iterator, Any, Union
-from grazie.api.client.gateway import AuthType, GrazieApiGatewayClient, GrazieAgent
-from grazie.api.client.endpoints import GrazieApiGatewayUrls
-from grazie.api.client.profiles import LLMProfileIDs
-from grazie.api.client.llm.v5.requests import LLMRequest
-from grazie.api.client.llm.v5.responses import LLMResponse
-from grazie.api.client.llm.v5.entities import LLMMessageContent, LLMMessageRole, LLMMessage
-from grazie.api.client.llm.v5.parameters import LLMParameters
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Dict, List, Optional, Iterable, Iterator, AsyncIterator, Any, Union
+
+if TYPE_CHECKING:
+    from grazie.api.client.llm.v5.entities import LLMMessage
+    from grazie.api.client.llm.v5.parameters import LLMParameters
+    from semantic_cache import SemanticCache
+
+
+@functools.lru_cache(maxsize=None)
+def _get_sdk() -> SimpleNamespace:
+    """Import the grazie SDK on first use so importing this module stays cheap."""
+    from grazie.api.client.gateway import AuthType, GrazieApiGatewayClient, GrazieAgent
+    from grazie.api.client.endpoints import GrazieApiGatewayUrls
+    from grazie.api.client.llm.v5.requests import LLMRequest
+    from grazie.api.client.llm.v5.entities import LLMMessageContent, LLMMessageRole, LLMMessage
+    from grazie.api.client.llm.v5.parameters import LLMParameters
+
+    return SimpleNamespace(
+        AuthType=AuthType,
+        GrazieApiGatewayClient=GrazieApiGatewayClient,
+        GrazieAgent=GrazieAgent,
+        GrazieApiGatewayUrls=GrazieApiGatewayUrls,
+        LLMRequest=LLMRequest,
+        LLMMessageContent=LLMMessageContent,
+        LLMMessageRole=LLMMessageRole,
+        LLMMessage=LLMMessage,
+        LLMParameters=LLMParameters,
+        # Map message types to SDK roles
+        role_map={
+            "user": LLMMessageRole.USER,
+            "system": LLMMessageRole.SYSTEM,
+            "assistant": LLMMessageRole.ASSISTANT,
+            "user_message": LLMMessageRole.USER,
+            "assistant_message": LLMMessageRole.ASSISTANT
+        },
+    )
+
+# System prompts at least this long are marked for Anthropic prompt caching
+PROMPT_CACHE_MIN_CHARS = 1024
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+PROFILES_CACHE_TTL = 3600
+
+# Stream chunk types shared by the producer and every consumer in this module
+CONTENT_CHUNK = "Content"
+FINISH_CHUNK = "FinishMetadata"
+QUOTA_CHUNK = "QuotaMetadata"
+
+# Content chunks are merged up to this many characters or this many milliseconds
+STREAM_COALESCE_CHARS = 64
+STREAM_COALESCE_MS = 20
+# Chunks AsyncGrazieSDKClient.chat_stream buffers before the upstream reader waits for the consumer
+STREAM_QUEUE_MAX_CHUNKS = 64
+
+RESPONSE_CACHE_TTL = 1800
+RESPONSE_CACHE_MAX_SIZE = int(os.getenv('GRAZIE_RESPONSE_CACHE_SIZE', '256'))
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with per-entry expiry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _is_cacheable(parameters: Optional[Dict[str, Any]]) -> bool:
+    """
+    Only deterministic requests are replayed: an explicit temperature of 0 or a fixed seed.
+
+    Without parameters the provider samples at its default temperature, so those aren't either.
+    """
+    if not parameters:
+        return False
+    return parameters.get("temperature") == 0 or parameters.get("seed") is not None
+
+
+def cached_llm(ttl: float = RESPONSE_CACHE_TTL):
+    """
+    Cache a chat_stream-style generator on (token, environment, profile, messages, parameters).
+
+    A miss streams through unchanged and stores the concatenated content once
+    the stream finishes; a hit replays it as a single Content chunk followed by
+    the original FinishMetadata.
+    """
+    cache = ResponseCache(RESPONSE_CACHE_MAX_SIZE, ttl)
+
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            if not _is_cacheable(arguments["parameters"]):
+                yield from method(self, *args, **kwargs)
+                return
+
+            # The token is part of the key: profile entitlements differ between users
+            key = hashlib.sha256(json.dumps({
+                "token": self.token_hash,
+                "environment": self.environment,
+                "profile": arguments["profile"],
+                "messages": arguments["messages"],
+                "params": arguments["parameters"],
+            }, sort_keys=True, default=str).encode()).hexdigest()
+
+            cached = cache.get(key)
+            if cached is not None:
+                content, finish_reason = cached
+                if content:
+                    yield {"type": CONTENT_CHUNK, "content": content}
+                if finish_reason is not None:
+                    yield {"type": FINISH_CHUNK, "reason": finish_reason}
+                return
+
+            content_parts = []
+            finish_reason = None
+            for chunk in method(self, *args, **kwargs):
+                chunk_type = chunk.get("type")
+                if chunk_type == CONTENT_CHUNK:
+                    content_parts.append(chunk.get("content", ""))
+                elif chunk_type == FINISH_CHUNK:
+                    finish_reason = chunk.get("reason")
+                yield chunk
+            cache.set(key, ("".join(content_parts), finish_reason))
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
 
 
 class GrazieSDKClient:
@@ -15,28 +180,106 @@ class GrazieSDKClient:
     Provides similar functionality to the original client but with SDK benefits.
     """
     
-    def __init__(self, jwt_token: Optional[str] = None, environment: str = "staging"):
+    # Sampling presets for create_creative_params / create_focused_params
+    _CREATIVE_PARAMS = {
+        "low": {'temperature': 0.7, 'top_p': 0.8},
+        "medium": {'temperature': 1.0, 'top_p': 0.9},
+        "high": {'temperature': 1.3, 'top_p': 0.95}
+    }
+    
+    _FOCUSED_PARAMS = {
+        "low": {'temperature': 0.8, 'top_k': 40},
+        "medium": {'temperature': 0.6, 'top_k': 20},
+        "high": {'temperature': 0.3, 'top_k': 10}
+    }
+    
+    # (parameter key, LLMParameters attribute, optional value transform)
+    _PARAM_MAP = (
+        ("temperature", "temperature", None),
+        ("top_p", "top_p", None),
+        ("top_k", "top_k", None),
+        ("max_tokens", "max_tokens", None),
+        ("seed", "seed", None),
+        ("stop_token", "stop_sequences", lambda value: [value]),
+    )
+    
+    def __init__(self,
+                 jwt_token: Optional[str] = None,
+                 environment: str = "staging",
+                 semantic_cache: Optional[SemanticCache] = None):
         self.jwt_token = jwt_token or os.getenv('GRAZIE_JWT_TOKEN') or os.getenv('USER_JWT_TOKEN')
         self.environment = environment
+        self.semantic_cache = semantic_cache
         
         if not self.jwt_token:
             raise ValueError("JWT token required. Set GRAZIE_JWT_TOKEN environment variable or pass jwt_token parameter.")
+        # Identifies the token in response cache keys without keeping it there
+        self.token_hash = hashlib.blake2b(self.jwt_token.encode(), digest_size=16).hexdigest()
         
         # Initialize the SDK client
-        self.client = GrazieApiGatewayClient(
-            url=GrazieApiGatewayUrls.STAGING if environment == "staging" else GrazieApiGatewayUrls.PRODUCTION,
+        sdk = _get_sdk()
+        self.client = sdk.GrazieApiGatewayClient(
+            url=sdk.GrazieApiGatewayUrls.STAGING if environment == "staging" else sdk.GrazieApiGatewayUrls.PRODUCTION,
             grazie_jwt_token=self.jwt_token,
-            auth_type=AuthType.USER,
-            grazie_agent=GrazieAgent(name="grazie-sdk-client", version="1.0")
+            auth_type=sdk.AuthType.USER,
+            grazie_agent=sdk.GrazieAgent(name="grazie-sdk-client", version="1.0")
         )
         
         # Cache for profiles and capabilities
         self.profiles = {}
         self.model_capabilities = {}
+        self._chat_profiles = frozenset()
         self._load_profiles()
     
+    def _profiles_cache_path(self) -> Path:
+        """Per-environment, per-token location of the on-disk profiles cache."""
+        token_hash = hashlib.sha256(self.jwt_token.encode()).hexdigest()[:16]
+        return Path(tempfile.gettempdir()) / f"grazie_profiles_{self.environment}_{token_hash}.json"
+    
+    def _read_profiles_cache(self) -> bool:
+        """Fill model_capabilities from a fresh disk cache; return False on a miss."""
+        path = self._profiles_cache_path()
+        try:
+            if time.time() - path.stat().st_mtime >= PROFILES_CACHE_TTL:
+                return False
+            with path.open() as f:
+                capabilities = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        # SDK profile objects are not persisted; expose the capabilities instead
+        self.profiles.update(capabilities)
+        self.model_capabilities.update(capabilities)
+        return True
+    
+    def _write_profiles_cache(self):
+        """Persist model_capabilities atomically so concurrent readers never see a partial file."""
+        path = self._profiles_cache_path()
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump(self.model_capabilities, f, default=str)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Warning: Could not cache profiles: {e}")
+    
     def _load_profiles(self):
-        """Load available profiles and their capabilities from the API."""
+        """Load available profiles and their capabilities, preferring the disk cache."""
+        if not self._read_profiles_cache():
+            self._fetch_profiles()
+        
+        # validate_model_for_chat runs on every request; answer it with one set lookup
+        self._chat_profiles = frozenset(
+            profile_id for profile_id, caps in self.model_capabilities.items()
+            if "Chat" in caps.get("features", ())
+        )
+    
+    def _fetch_profiles(self):
+        """Fetch profiles from the API and refresh the disk cache."""
         try:
             # Get profiles using the SDK
             profiles_response = self.client.profiles()
@@ -53,6 +296,9 @@ class GrazieSDKClient:
                 }
         except Exception as e:
             print(f"Warning: Could not load profiles: {e}")
+            return
+        
+        self._write_profiles_cache()
     
     def get_available_models(self) -> List[str]:
         """Get list of available model IDs."""
@@ -67,29 +313,31 @@ class GrazieSDKClient:
     
     def validate_model_for_chat(self, profile: str) -> bool:
         """Check if a model supports chat functionality."""
-        caps = self.get_model_capabilities(profile)
-        return "Chat" in caps.get("features", [])
+        if profile in self._chat_profiles:
+            return True
+        # Unknown models still raise from get_model_capabilities
+        self.get_model_capabilities(profile)
+        return False
     
     def _convert_messages_to_sdk_format(self, messages: List[Dict[str, str]]) -> List[LLMMessage]:
         """Convert message format to SDK format."""
+        sdk = _get_sdk()
+        role_map = sdk.role_map
+        default_role = sdk.LLMMessageRole.USER
         sdk_messages = []
         for msg in messages:
-            # Map message types to SDK roles
-            role_mapping = {
-                "user": LLMMessageRole.USER,
-                "system": LLMMessageRole.SYSTEM,
-                "assistant": LLMMessageRole.ASSISTANT,
-                "user_message": LLMMessageRole.USER,
-                "assistant_message": LLMMessageRole.ASSISTANT
-            }
+            role = role_map.get(msg.get("type", "user"), default_role)
             
-            msg_type = msg.get("type", "user")
-            role = role_mapping.get(msg_type, LLMMessageRole.USER)
+            # Only attach metadata when asked so plain messages stay unchanged
+            extra = {}
+            if msg.get("cache_control"):
+                extra["metadata"] = {"cache_control": msg["cache_control"]}
             
             sdk_messages.append(
-                LLMMessage(
+                sdk.LLMMessage(
                     role=role,
-                    content=LLMMessageContent(value=msg.get("content", ""))
+                    content=sdk.LLMMessageContent(value=msg.get("content", "")),
+                    **extra
                 )
             )
         
@@ -101,37 +349,41 @@ class GrazieSDKClient:
             return None
         
         # Create parameters object with SDK
-        llm_params = LLMParameters()
+        llm_params = _get_sdk().LLMParameters()
         
         # Set common parameters
-        if "temperature" in parameters:
-            llm_params.temperature = parameters["temperature"]
-        if "top_p" in parameters:
-            llm_params.top_p = parameters["top_p"]
-        if "top_k" in parameters:
-            llm_params.top_k = parameters["top_k"]
-        if "max_tokens" in parameters:
-            llm_params.max_tokens = parameters["max_tokens"]
-        if "seed" in parameters:
-            llm_params.seed = parameters["seed"]
-        if "stop_token" in parameters:
-            llm_params.stop_sequences = [parameters["stop_token"]]
+        for key, attr, transform in self._PARAM_MAP:
+            if key in parameters:
+                value = parameters[key]
+                setattr(llm_params, attr, transform(value) if transform else value)
         
         return llm_params
     
+    @cached_llm()
     def chat_stream(self, 
                    messages: List[Dict[str, str]], 
                    profile: str = "anthropic-claude-3-5-sonnet-20241022",  # Default to Sonnet 4
                    parameters: Optional[Dict[str, Any]] = None,
-                   prompt: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+                   prompt: Optional[str] = None,
+                   coalesce_chars: int = STREAM_COALESCE_CHARS,
+                   coalesce_ms: float = STREAM_COALESCE_MS) -> Iterator[Dict[str, Any]]:
         """
         Stream chat completions using the SDK.
         
+        Small Content chunks are merged until coalesce_chars characters are
+        buffered or coalesce_ms has passed since the last yield, so consumers
+        flush fewer, larger writes. Pass coalesce_chars=0 to yield every chunk.
+        The window is only checked when the next chunk arrives, so a stalled
+        upstream can hold text back; AsyncGrazieSDKClient.chat_stream flushes
+        on a timer instead.
+        
         Args:
             messages: List of message dictionaries with 'type' and 'content' keys
             profile: Model profile ID (defaults to Claude Sonnet 4)
             parameters: Optional parameters for the model
             prompt: Optional prompt for tracking
+            coalesce_chars: Buffered content length that forces a yield
+            coalesce_ms: Maximum time content is held back, in milliseconds
         
         Yields:
             Dictionary chunks from the streaming response
@@ -146,12 +398,16 @@ class GrazieSDKClient:
         llm_params = self._create_llm_parameters(parameters)
         
         # Create the request
-        request = LLMRequest(
+        request = _get_sdk().LLMRequest(
             profile=profile,
             messages=sdk_messages,
             parameters=llm_params
         )
         
+        coalesce_window = coalesce_ms / 1000
+        buffer = io.StringIO()
+        last_flush = time.monotonic()
+        
         # Stream the response
         try:
             response_stream = self.client.llm_stream(request)
@@ -159,21 +415,45 @@ class GrazieSDKClient:
             for chunk in response_stream:
                 # Convert SDK response to compatible format
                 if hasattr(chunk, 'content') and chunk.content:
+                    buffer.write(chunk.content)
+                    now = time.monotonic()
+                    if buffer.tell() >= coalesce_chars or now - last_flush >= coalesce_window:
+                        yield {
+                            "type": CONTENT_CHUNK,
+                            "content": buffer.getvalue()
+                        }
+                        buffer.seek(0)
+                        buffer.truncate()
+                        last_flush = now
+                    continue
+                
+                # Metadata must not overtake buffered content
+                if buffer.tell():
                     yield {
-                        "type": "Content",
-                        "content": chunk.content
+                        "type": CONTENT_CHUNK,
+                        "content": buffer.getvalue()
                     }
-                elif hasattr(chunk, 'finish_reason'):
+                    buffer.seek(0)
+                    buffer.truncate()
+                    last_flush = time.monotonic()
+                
+                if hasattr(chunk, 'finish_reason'):
                     yield {
-                        "type": "FinishMetadata",
+                        "type": FINISH_CHUNK,
                         "reason": chunk.finish_reason
                     }
                 elif hasattr(chunk, 'usage'):
                     yield {
-                        "type": "QuotaMetadata",
+                        "type": QUOTA_CHUNK,
                         "spent": chunk.usage.__dict__ if chunk.usage else {},
                         "updated": {}
                     }
+            
+            if buffer.tell():
+                yield {
+                    "type": CONTENT_CHUNK,
+                    "content": buffer.getvalue()
+                }
                 
         except Exception as e:
             raise RuntimeError(f"Chat streaming failed: {e}")
@@ -195,11 +475,11 @@ class GrazieSDKClient:
         Returns:
             Complete response content as string
         """
-        content_parts = []
+        buffer = io.StringIO()
         for chunk in self.chat_stream(messages, profile, parameters, prompt):
-            if chunk.get("type") == "Content":
-                content_parts.append(chunk.get("content", ""))
-        return "".join(content_parts)
+            if chunk.get("type") == CONTENT_CHUNK:
+                buffer.write(chunk.get("content", ""))
+        return buffer.getvalue()
     
     def simple_chat(self, 
                    user_message: str, 
@@ -224,8 +504,27 @@ class GrazieSDKClient:
         if system_message:
             messages.append({"type": "system", "content": system_message})
         messages.append({"type": "user", "content": user_message})
+        if self.semantic_cache is not None and _is_cacheable(parameters):
+            return self._semantic_chat_complete(user_message, system_message, messages, profile, parameters)
         return self.chat_complete(messages, profile, parameters, prompt)
     
+    def _semantic_chat_complete(self,
+                                user_message: str,
+                                system_message: Optional[str],
+                                messages: List[Dict[str, Any]],
+                                profile: str,
+                                parameters: Optional[Dict[str, Any]]) -> str:
+        """Answer from the semantic cache when a near-duplicate prompt was already seen."""
+        # Only prompts sharing token, environment, profile, system message and parameters may match
+        namespace = json.dumps([self.token_hash, self.environment, profile, system_message, parameters],
+                               sort_keys=True, default=str)
+        vector = self.semantic_cache.encode(user_message)
+        response = self.semantic_cache.get(namespace, vector)
+        if response is None:
+            response = self.chat_complete(messages, profile, parameters)
+            self.semantic_cache.set(namespace, vector, response)
+        return response
+    
     def chat_stream_with_metadata(self, 
                                 messages: List[Dict[str, str]], 
                                 profile: str = "anthropic-claude-3-5-sonnet-20241022",  # Default to Sonnet 4
@@ -243,44 +542,41 @@ class GrazieSDKClient:
         Returns:
             Tuple of (content, metadata)
         """
-        chunks = []
-        content_parts = []
-        
-        for chunk in self.chat_stream(messages, profile, parameters, prompt):
-            chunks.append(chunk)
-            if chunk.get("type") == "Content":
-                content_parts.append(chunk.get("content", ""))
-        
-        content = "".join(content_parts)
-        metadata = self.extract_response_metadata(chunks)
-        
-        return content, metadata
+        return self._consume_stream(self.chat_stream(messages, profile, parameters, prompt))
     
-    def extract_response_metadata(self, stream_chunks: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Extract metadata from stream response chunks."""
+    def _consume_stream(self, stream_chunks: Iterable[Dict[str, Any]]) -> tuple[str, Dict[str, Any]]:
+        """Collect content and metadata in one pass, without retaining the chunks."""
         metadata = {
             'finish_reason': None,
             'quota_info': None,
             'content_length': 0,
-            'token_count': None
+            'token_count': None,
+            'cache_read_input_tokens': None
         }
         
-        content_chars = 0
+        buffer = io.StringIO()
         for chunk in stream_chunks:
             chunk_type = chunk.get('type')
             
-            if chunk_type == "Content":
-                content_chars += len(chunk.get('content', ''))
-            elif chunk_type == "FinishMetadata":
+            if chunk_type == CONTENT_CHUNK:
+                buffer.write(chunk.get('content', ''))
+            elif chunk_type == FINISH_CHUNK:
                 metadata['finish_reason'] = chunk.get('reason')
-            elif chunk_type == "QuotaMetadata":
+            elif chunk_type == QUOTA_CHUNK:
+                spent = chunk.get('spent', {})
                 metadata['quota_info'] = {
-                    'spent': chunk.get('spent', {}),
+                    'spent': spent,
                     'updated': chunk.get('updated', {})
                 }
+                metadata['cache_read_input_tokens'] = spent.get('cache_read_input_tokens')
         
-        metadata['content_length'] = content_chars
-        return metadata
+        content = buffer.getvalue()
+        metadata['content_length'] = len(content)
+        return content, metadata
+    
+    def extract_response_metadata(self, stream_chunks: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Extract metadata from stream response chunks."""
+        return self._consume_stream(stream_chunks)[1]
     
     # Helper methods for creating common parameter sets
     def create_deterministic_params(self, seed: int = 42) -> Dict[str, Any]:
@@ -292,25 +588,20 @@ class GrazieSDKClient:
     
     def create_creative_params(self, creativity_level: str = "medium") -> Dict[str, Any]:
         """Create parameters for creative output."""
-        if creativity_level == "low":
-            return {'temperature': 0.7, 'top_p': 0.8}
-        elif creativity_level == "medium":
-            return {'temperature': 1.0, 'top_p': 0.9}
-        elif creativity_level == "high":
-            return {'temperature': 1.3, 'top_p': 0.95}
-        else:
-            raise ValueError("creativity_level must be 'low', 'medium', or 'high'")
+        try:
+            preset = self._CREATIVE_PARAMS[creativity_level]
+        except KeyError:
+            raise ValueError("creativity_level must be 'low', 'medium', or 'high'") from None
+        # Copy so callers can tweak the result without changing the preset
+        return dict(preset)
     
     def create_focused_params(self, focus_level: str = "medium") -> Dict[str, Any]:
         """Create parameters for focused/deterministic output."""
-        if focus_level == "low":
-            return {'temperature': 0.8, 'top_k': 40}
-        elif focus_level == "medium":
-            return {'temperature': 0.6, 'top_k': 20}
-        elif focus_level == "high":
-            return {'temperature': 0.3, 'top_k': 10}
-        else:
-            raise ValueError("focus_level must be 'low', 'medium', or 'high'")
+        try:
+            preset = self._FOCUSED_PARAMS[focus_level]
+        except KeyError:
+            raise ValueError("focus_level must be 'low', 'medium', or 'high'") from None
+        return dict(preset)
     
     def create_json_response_params(self) -> Dict[str, Any]:
         """Create parameters to ensure JSON response format."""
@@ -319,6 +610,17 @@ class GrazieSDKClient:
         }
     
     # Sonnet 4 specific methods
+    def _sonnet4_messages(self, user_message: str, system_message: Optional[str]) -> List[Dict[str, Any]]:
+        """Build Sonnet 4 messages, marking long system prompts for prompt caching."""
+        messages = []
+        if system_message:
+            system = {"type": "system", "content": system_message}
+            if len(system_message) >= PROMPT_CACHE_MIN_CHARS:
+                system["cache_control"] = EPHEMERAL_CACHE_CONTROL
+            messages.append(system)
+        messages.append({"type": "user", "content": user_message})
+        return messages
+    
     def sonnet4_chat(self, 
                     user_message: str, 
                     system_message: Optional[str] = None,
@@ -334,12 +636,11 @@ class GrazieSDKClient:
         Returns:
             Response content as string
         """
-        return self.simple_chat(
-            user_message=user_message,
-            system_message=system_message,
-            profile="anthropic-claude-3-5-sonnet-20241022",  # Sonnet 4
-            parameters=parameters
-        )
+        profile = "anthropic-claude-3-5-sonnet-20241022"  # Sonnet 4
+        messages = self._sonnet4_messages(user_message, system_message)
+        if self.semantic_cache is not None and _is_cacheable(parameters):
+            return self._semantic_chat_complete(user_message, system_message, messages, profile, parameters)
+        return self.chat_complete(messages=messages, profile=profile, parameters=parameters)
     
     def sonnet4_stream(self, 
                       user_message: str, 
@@ -356,13 +657,188 @@ class GrazieSDKClient:
         Yields:
             Dictionary chunks from the streaming response
         """
-        messages = []
-        if system_message:
-            messages.append({"type": "system", "content": system_message})
-        messages.append({"type": "user", "content": user_message})
-        
         yield from self.chat_stream(
-            messages=messages,
+            messages=self._sonnet4_messages(user_message, system_message),
             profile="anthropic-claude-3-5-sonnet-20241022",  # Sonnet 4
             parameters=parameters
-        ) 
\ No newline at end of file
+        )
+
+
+_shared_clients: Dict[tuple, GrazieSDKClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_client(jwt_token: Optional[str] = None, environment: str = "staging") -> GrazieSDKClient:
+    """
+    Return a process-wide GrazieSDKClient for this token and environment.
+
+    Reusing the instance keeps the SDK transport's keep-alive connections
+    warm, so later calls skip the TCP and TLS handshakes as well as the
+    profiles fetch.
+    """
+    token = jwt_token or os.getenv('GRAZIE_JWT_TOKEN') or os.getenv('USER_JWT_TOKEN')
+    if not token:
+        # Let the constructor raise its usual error
+        return GrazieSDKClient(jwt_token=token, environment=environment)
+    
+    key = (environment, hashlib.sha256(token.encode()).hexdigest())
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = GrazieSDKClient(jwt_token=token, environment=environment)
+            _shared_clients[key] = client
+        return client
+
+
+class AsyncGrazieSDKClient:
+    """
+    Asyncio front-end for GrazieSDKClient.
+
+    The SDK transport is blocking, so each stream is pumped on a worker thread
+    and handed back to the event loop chunk by chunk. This lets several chats
+    overlap in one process instead of running back to back.
+    """
+
+    def __init__(self,
+                 jwt_token: Optional[str] = None,
+                 environment: str = "staging",
+                 max_concurrency: int = 8,
+                 client: Optional[GrazieSDKClient] = None):
+        self.client = client or GrazieSDKClient(jwt_token=jwt_token, environment=environment)
+        self.max_concurrency = max_concurrency
+
+    @classmethod
+    async def create(cls,
+                     jwt_token: Optional[str] = None,
+                     environment: str = "staging",
+                     max_concurrency: int = 8) -> "AsyncGrazieSDKClient":
+        """Build the client without blocking the event loop on the profiles fetch."""
+        client = await asyncio.to_thread(GrazieSDKClient, jwt_token, environment)
+        return cls(max_concurrency=max_concurrency, client=client)
+
+    async def chat_stream(self,
+                          messages: List[Dict[str, str]],
+                          profile: str = "anthropic-claude-3-5-sonnet-20241022",  # Default to Sonnet 4
+                          parameters: Optional[Dict[str, Any]] = None,
+                          prompt: Optional[str] = None,
+                          coalesce_chars: int = STREAM_COALESCE_CHARS,
+                          coalesce_ms: float = STREAM_COALESCE_MS) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream chat completions without blocking the event loop.
+
+        Content is merged as in GrazieSDKClient.chat_stream, but buffered text
+        is flushed once coalesce_ms has passed even if upstream goes quiet.
+
+        Yields:
+            Dictionary chunks from the streaming response
+        """
+        loop = asyncio.get_running_loop()
+        # Bounded, so a slow consumer holds back the upstream reader
+        queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_MAX_CHUNKS)
+        # Set once the consumer stops listening (finished, broke early or was cancelled)
+        stop = threading.Event()
+        done = object()
+
+        def put(item) -> None:
+            # Blocks while the queue is full; skipped once nobody is reading
+            if not stop.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+        def pump():
+            # Coalescing happens on the loop side, where it can run on a timer
+            stream = self.client.chat_stream(messages, profile, parameters, prompt, coalesce_chars=0)
+            try:
+                for chunk in stream:
+                    if stop.is_set():
+                        break
+                    put(chunk)
+            except Exception as e:
+                put(e)
+            finally:
+                # Closing the generator ends the upstream request early
+                stream.close()
+                put(done)
+
+        coalesce_window = coalesce_ms / 1000
+        buffer = io.StringIO()
+        deadline = 0.0
+        worker = loop.run_in_executor(None, pump)
+        try:
+            while True:
+                if buffer.tell():
+                    # Wait no longer than the held-back text is allowed to sit
+                    try:
+                        item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                    except asyncio.TimeoutError:
+                        item = None
+                else:
+                    item = await queue.get()
+                if isinstance(item, dict) and item.get("type") == CONTENT_CHUNK:
+                    if not buffer.tell():
+                        deadline = loop.time() + coalesce_window
+                    buffer.write(item.get("content", ""))
+                    if buffer.tell() < coalesce_chars:
+                        continue
+                    item = None
+                # Window closed, size reached, or metadata that must not overtake content
+                if buffer.tell():
+                    yield {"type": CONTENT_CHUNK, "content": buffer.getvalue()}
+                    buffer.seek(0)
+                    buffer.truncate()
+                if item is None:
+                    continue
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Free the slot a blocked put may be waiting on; the pump then sees stop
+            while not queue.empty():
+                queue.get_nowait()
+            await worker
+
+    async def chat_complete_async(self,
+                                  messages: List[Dict[str, str]],
+                                  profile: str = "anthropic-claude-3-5-sonnet-20241022",  # Default to Sonnet 4
+                                  parameters: Optional[Dict[str, Any]] = None,
+                                  prompt: Optional[str] = None) -> str:
+        """Complete chat request and return the full response."""
+        buffer = io.StringIO()
+        async for chunk in self.chat_stream(messages, profile, parameters, prompt):
+            if chunk.get("type") == CONTENT_CHUNK:
+                buffer.write(chunk.get("content", ""))
+        return buffer.getvalue()
+
+    async def chat_batch(self,
+                         prompts: List[Union[str, List[Dict[str, str]]]],
+                         profile: str = "anthropic-claude-3-5-sonnet-20241022",  # Default to Sonnet 4
+                         parameters: Optional[Dict[str, Any]] = None,
+                         system_message: Optional[str] = None) -> List[str]:
+        """
+        Run several chats concurrently, at most max_concurrency at a time.
+
+        Args:
+            prompts: User messages, or full message lists
+            profile: Model profile ID (defaults to Claude Sonnet 4)
+            parameters: Optional parameters shared by every request
+            system_message: Optional system message prepended to plain string prompts
+
+        Returns:
+            Responses in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(item):
+            if isinstance(item, str):
+                messages = []
+                if system_message:
+                    messages.append({"type": "system", "content": system_message})
+                messages.append({"type": "user", "content": item})
+            else:
+                messages = item
+            async with semaphore:
+                return await self.chat_complete_async(messages, profile, parameters)
+
+        return await asyncio.gather(*(run(item) for item in prompts))
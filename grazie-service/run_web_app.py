@@ -14,11 +14,57 @@ Usage:
     python run_web_app.py
 
 The web app will be available at: http://localhost:8000
+
+When gunicorn is installed the app runs under gunicorn's threaded workers so
+concurrent streaming chats are served in parallel; otherwise it falls back to
+the Flask development server. Tune with GRAZIE_THREADS; GRAZIE_WORKERS adds
+processes, but the token, client and response caches live in each worker, so
+more than one worker means duplicated caches and extra validation calls.
 """
 
 import os
 import sys
 
+HOST = '0.0.0.0'
+PORT = 8000
+
+
+def run_gunicorn(app):
+    """Serve app with gunicorn's gthread workers; return False if gunicorn is missing."""
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        return False
+    
+    class GrazieWebApp(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+        
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+        
+        def load(self):
+            return self.application
+    
+    options = {
+        'bind': f'{HOST}:{PORT}',
+        # Real threads rather than gevent: the ZIP pipeline uses a thread pool
+        'worker_class': 'gthread',
+        # One worker scaled by threads keeps the in-process caches shared;
+        # extra workers are opt-in and each gets its own copy of the caches
+        'workers': int(os.getenv('GRAZIE_WORKERS', '1')),
+        'threads': int(os.getenv('GRAZIE_THREADS', '16')),
+        # Long LLM streams must not be mistaken for hung workers
+        'timeout': 300,
+        'keepalive': 5,
+    }
+    GrazieWebApp(app, options).run()
+    return True
+
+
 # Add current directory to Python path so we can import our modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -29,7 +75,7 @@ try:
     print("🚀 Starting Grazie AI Client Web App")
     print("="*60)
     print(f"📱 Web Interface: http://localhost:8000")
-    print(f"🔧 Environment: Development")
+    print(f"🔧 Workers: {os.getenv('GRAZIE_WORKERS', '1')} x {os.getenv('GRAZIE_THREADS', '16')} threads (gunicorn, if installed)")
     print(f"📁 Working Directory: {os.getcwd()}")
     print("="*60)
     print("💡 Tips:")
@@ -41,7 +87,9 @@ try:
     print("Press Ctrl+C to stop the server")
     print()
     
-    app.run(debug=True, host='0.0.0.0', port=8000)
+    if not run_gunicorn(app):
+        print("⚠️  gunicorn not installed; using the Flask development server")
+        app.run(debug=True, host=HOST, port=PORT, threaded=True)
     
 except ImportError as e:
     print(f"❌ Import error: {e}")
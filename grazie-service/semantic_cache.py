@@ -0,0 +1,109 @@
+"""
+Embedding-based cache that answers near-duplicate chat prompts.
+
+Exact-match caching misses paraphrases ("explain quantum computing" vs
+"break down quantum computing basics"). SemanticCache embeds each prompt
+with a local SentenceTransformer model and returns a stored response when a
+previous prompt in the same namespace is within the cosine threshold.
+
+Requires the optional sentence-transformers package:
+    pip install sentence-transformers
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+
+class SemanticCache:
+    """Thread-safe, optionally disk-backed nearest-neighbour response cache."""
+
+    def __init__(self,
+                 threshold: float = 0.95,
+                 model_name: str = "all-MiniLM-L6-v2",
+                 path: Optional[Union[str, Path]] = None,
+                 max_entries: int = 1000):
+        try:
+            import numpy as np
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SemanticCache requires sentence-transformers: pip install sentence-transformers"
+            ) from e
+
+        self._np = np
+        self._model = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+
+        dimension = self._model.get_sentence_embedding_dimension()
+        self._embeddings = np.empty((0, dimension), dtype=np.float32)
+        self._entries = []  # (namespace, response), row-aligned with _embeddings
+        self._lock = threading.Lock()
+
+        if self.path and self.path.exists():
+            self._load()
+
+    def encode(self, text: str):
+        """Return the unit-length embedding for text."""
+        vector = self._model.encode([text], normalize_embeddings=True)[0]
+        return vector.astype(self._np.float32)
+
+    def get(self, namespace: str, vector) -> Optional[str]:
+        """Return the closest cached response in namespace at or above the threshold."""
+        np = self._np
+        with self._lock:
+            if not self._entries:
+                return None
+            # Embeddings are normalised, so the dot product is the cosine similarity
+            scores = self._embeddings @ vector
+            for index in np.argsort(scores)[::-1]:
+                if scores[index] < self.threshold:
+                    break
+                entry_namespace, response = self._entries[index]
+                if entry_namespace == namespace:
+                    return response
+        return None
+
+    def set(self, namespace: str, vector, response: str):
+        """Store response for vector, evicting the oldest entries past max_entries."""
+        np = self._np
+        with self._lock:
+            self._embeddings = np.vstack([self._embeddings, vector[np.newaxis, :]])
+            self._entries.append((namespace, response))
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self._embeddings = self._embeddings[overflow:]
+                del self._entries[:overflow]
+            if self.path:
+                self._save()
+
+    def _load(self):
+        try:
+            with self._np.load(self.path, allow_pickle=False) as data:
+                embeddings = data["embeddings"]
+                entries = [tuple(entry) for entry in json.loads(str(data["entries"]))]
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Warning: Could not load semantic cache: {e}")
+            return
+        if embeddings.shape[1:] == self._embeddings.shape[1:] and len(entries) == len(embeddings):
+            self._embeddings = embeddings.astype(self._np.float32)
+            self._entries = entries
+
+    def _save(self):
+        """Write the cache atomically; callers hold the lock."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    self._np.savez(f, embeddings=self._embeddings, entries=json.dumps(self._entries))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            print(f"Warning: Could not save semantic cache: {e}")
@@ -10,17 +10,32 @@ It accepts JSON-RPC 2.0 commands and executes them using Claude API.
 Usage:
     export ANTHROPIC_API_KEY="sk-ant-..."
     python lightweight_agent_server.py --port 35697
+
+WebSocket permessage-deflate is disabled. Clients talk to this server over
+localhost or a LAN, where compressing small JSON-RPC frames costs more CPU
+than it saves on the wire. Even the larger agent.task results are a few KiB
+of text, which cross a local link faster uncompressed.
+
+--workers N runs N processes on the same port. The task, workspace-context
+and semantic caches, the Anthropic connection pool and any embedding model
+are per worker: each extra worker dilutes cache hit rates and adds its own
+copies, so keep the default of 1 unless throughput is CPU-bound.
 """
 
 import asyncio
-import json
+import hashlib
+import importlib.util
 import os
-import subprocess
+import signal
+import sys
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Awaitable, Callable, AsyncIterator, Iterator, Set, Tuple, Union
 
 import anthropic
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import orjson
+from fastapi import FastAPI, WebSocket
 from fastapi.responses import HTMLResponse
 import uvicorn
 
@@ -28,155 +43,348 @@ import uvicorn
 class LightweightAgentServer:
     """Minimal agent server that accepts RPC commands and calls Claude"""
 
+    # Seconds a workspace listing is reused while the root directory is unchanged
+    WORKSPACE_CONTEXT_TTL = 5
+
+    # Size budget for the workspace listing in the prompt, and the longest path shown whole
+    WORKSPACE_CONTEXT_MAX_BYTES = 2048
+    WORKSPACE_CONTEXT_MAX_PATH = 120
+
+    # Completed agent.task results kept for identical / near-identical tasks
+    TASK_CACHE_MAX_SIZE = 256
+
     def __init__(self, workspace_root: str = "/workspace"):
         self.workspace_root = Path(workspace_root)
         api_key = os.getenv("ANTHROPIC_API_KEY")
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable required")
 
-        self.client = anthropic.Anthropic(api_key=api_key)
+        # Async client: awaiting Claude must not block other WebSocket clients.
+        # Idle connections are kept for 30s (SDK default 5s) so concurrent and
+        # back-to-back agent.task calls skip the TLS handshake; HTTP/2
+        # multiplexes them when h2 is installed. The Limits class is taken from
+        # the SDK so it matches whichever httpx build the SDK was built against.
+        limits = type(anthropic.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=100, max_keepalive_connections=50, keepalive_expiry=30
+        )
+        http_client = anthropic.DefaultAsyncHttpxClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=limits
+        )
+        self.client = anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
         self.request_id = 0
 
-    async def handle_agent_task(self, task: str) -> Dict[str, Any]:
+        # Static agent.task instructions, sent ahead of the volatile workspace listing
+        self._system_instructions = f"""You are an AI coding assistant running in a development environment.
+
+Workspace root: {self.workspace_root}
+Current working directory: {os.getcwd()}
+
+When asked to create or modify files, provide the complete file content.
+When asked to execute commands, explain what the command does."""
+        # (root mtime_ns, built at, context text)
+        self._context_cache = (None, 0.0, "")
+
+        # Exact-match results keyed by task + workspace context
+        self._task_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Optional paraphrase tier, enabled by AGENT_SEMANTIC_CACHE_THRESHOLD (e.g. 0.95)
+        self._semantic_threshold = float(os.getenv("AGENT_SEMANTIC_CACHE_THRESHOLD", "0")) or None
+        self._embedder = None
+        self._semantic_entries = []  # (context hash, unit vector, result)
+
+    async def handle_agent_task(self, task: str,
+                                on_delta: Optional[Callable[[str], Awaitable[None]]] = None) -> Dict[str, Any]:
         """
         Handle an agent.task RPC call
 
-        This sends the task to Claude and returns the response
+        This sends the task to Claude and returns the response. When on_delta
+        is given it is awaited with each text fragment as Claude streams it.
         """
         print(f"[Agent Task] {task}")
 
         try:
             # Build context about the workspace
-            context = self._build_workspace_context()
-
-            # Call Claude API
-            message = self.client.messages.create(
+            context = await asyncio.to_thread(self._build_workspace_context)
+
+            # Answers depend on the workspace, so only reuse them for the same listing
+            context_hash = hashlib.blake2b(context.encode(), digest_size=16).hexdigest()
+            key = hashlib.blake2b((task + "\0" + context_hash).encode(), digest_size=16).hexdigest()
+            cached = self._task_cache.get(key)
+            if cached is not None:
+                self._task_cache.move_to_end(key)
+                return cached
+
+            vector = None
+            if self._semantic_threshold:
+                vector = await asyncio.to_thread(self._embed, task)
+                cached = self._semantic_lookup(context_hash, vector)
+                if cached is not None:
+                    return cached
+
+            # Call Claude API. The static instructions come first so a changed
+            # workspace listing doesn't invalidate them; each block carries a
+            # breakpoint. Anthropic only caches prefixes of 1024+ tokens, so
+            # these take effect once the instructions grow past that.
+            async with self.client.messages.stream(
                 model="claude-3-5-sonnet-20241022",
                 max_tokens=4096,
-                system=f"""You are an AI coding assistant running in a development environment.
-
-Workspace root: {self.workspace_root}
-Current working directory: {os.getcwd()}
-
-{context}
-
-When asked to create or modify files, provide the complete file content.
-When asked to execute commands, explain what the command does.""",
+                system=[
+                    {
+                        "type": "text",
+                        "text": self._system_instructions,
+                        "cache_control": {"type": "ephemeral"}
+                    },
+                    {
+                        "type": "text",
+                        "text": context,
+                        "cache_control": {"type": "ephemeral"}
+                    }
+                ],
                 messages=[{
                     "role": "user",
                     "content": task
                 }]
-            )
+            ) as stream:
+                if on_delta is not None:
+                    async for text in stream.text_stream:
+                        await on_delta(text)
+                message = await stream.get_final_message()
 
             # Extract response
             response_text = message.content[0].text
 
-            return {
+            result = {
                 "status": "completed",
                 "output": response_text,
                 "model": message.model,
                 "usage": {
                     "input_tokens": message.usage.input_tokens,
-                    "output_tokens": message.usage.output_tokens
+                    "output_tokens": message.usage.output_tokens,
+                    "cache_creation_input_tokens": getattr(message.usage, "cache_creation_input_tokens", None),
+                    "cache_read_input_tokens": getattr(message.usage, "cache_read_input_tokens", None)
                 }
             }
+            self._remember_task(key, context_hash, vector, result)
+            return result
         except Exception as e:
             return {
                 "status": "error",
                 "error": str(e)
             }
 
+    def _remember_task(self, key: str, context_hash: str, vector, result: Dict[str, Any]) -> None:
+        self._task_cache[key] = result
+        if len(self._task_cache) > self.TASK_CACHE_MAX_SIZE:
+            self._task_cache.popitem(last=False)
+        if vector is not None:
+            self._semantic_entries.append((context_hash, vector, result))
+            del self._semantic_entries[:-self.TASK_CACHE_MAX_SIZE]
+
+    def _embed(self, text: str):
+        """Unit-length embedding of text; loads the model on first use"""
+        if self._embedder is None:
+            from sentence_transformers import SentenceTransformer
+            self._embedder = SentenceTransformer("all-MiniLM-L6-v2")
+        return self._embedder.encode(text, normalize_embeddings=True)
+
+    def _semantic_lookup(self, context_hash: str, vector) -> Optional[Dict[str, Any]]:
+        best_score, best_result = self._semantic_threshold, None
+        for entry_hash, entry_vector, result in self._semantic_entries:
+            if entry_hash != context_hash:
+                continue
+            # Vectors are normalised, so the dot product is the cosine similarity
+            score = float(entry_vector @ vector)
+            if score >= best_score:
+                best_score, best_result = score, result
+        return best_result
+
     def _build_workspace_context(self) -> str:
-        """Build context about the current workspace"""
+        """Build context about the current workspace, reusing a recent listing"""
         try:
-            # List files in workspace
-            files = list(self.workspace_root.glob("**/*"))
-            file_list = [str(f.relative_to(self.workspace_root)) for f in files if f.is_file()][:50]
+            mtime = self.workspace_root.stat().st_mtime_ns
+        except OSError as e:
+            return f"Could not read workspace: {e}"
 
-            context = f"Files in workspace (first 50):\n"
-            for f in file_list:
-                context += f"  - {f}\n"
+        cached_mtime, built_at, cached_context = self._context_cache
+        now = time.monotonic()
+        if cached_mtime == mtime and now - built_at < self.WORKSPACE_CONTEXT_TTL:
+            return cached_context
 
-            return context
+        context = self._list_workspace_files()
+        self._context_cache = (mtime, now, context)
+        return context
+
+    def _list_workspace_files(self) -> str:
+        try:
+            # List files in workspace until the listing reaches its byte budget
+            header, more = "Files in workspace:\n", "  ...\n"
+            budget = self.WORKSPACE_CONTEXT_MAX_BYTES - len(more)
+            lines = [header]
+            size = len(header)
+            for f in self._iter_files():
+                line = f"  - {self._shorten_path(f)}\n"
+                line_size = len(line.encode())
+                if size + line_size > budget:
+                    lines.append(more)
+                    break
+                lines.append(line)
+                size += line_size
+
+            return "".join(lines)
         except Exception as e:
             return f"Could not read workspace: {e}"
 
+    def _shorten_path(self, path: str) -> str:
+        """Elide the middle of overly long paths"""
+        limit = self.WORKSPACE_CONTEXT_MAX_PATH
+        if len(path) > limit:
+            keep = limit - 3
+            path = path[:keep // 2] + "..." + path[-(keep - keep // 2):]
+        return path
+
+    def _iter_files(self) -> Iterator[str]:
+        """Yield workspace-relative file paths lazily, so callers can stop the walk early"""
+        root = str(self.workspace_root)
+        stack = [root]
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                # Unreadable subdirectories are skipped, as Path.glob did
+                if directory == root:
+                    raise
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield os.path.relpath(entry.path, root)
+                    elif entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+
     async def handle_file_list(self, path: str) -> Dict[str, Any]:
         """List files in a directory"""
         try:
-            target = self.workspace_root / path.lstrip("/")
-            if not target.exists():
-                return {"error": f"Path does not exist: {path}"}
-
-            if target.is_file():
-                return {"files": [{"name": target.name, "type": "file"}]}
-
-            files = []
-            for item in target.iterdir():
-                files.append({
-                    "name": item.name,
-                    "type": "directory" if item.is_dir() else "file",
-                    "size": item.stat().st_size if item.is_file() else None
-                })
-
-            return {"files": files}
+            # Disk access runs in a worker thread so the event loop stays responsive
+            return await asyncio.to_thread(self._list_files, path)
         except Exception as e:
             return {"error": str(e)}
 
+    def _list_files(self, path: str) -> Dict[str, Any]:
+        target = self.workspace_root / path.lstrip("/")
+        if not target.exists():
+            return {"error": f"Path does not exist: {path}"}
+
+        if target.is_file():
+            return {"files": [{"name": target.name, "type": "file"}]}
+
+        files = []
+        for item in target.iterdir():
+            files.append({
+                "name": item.name,
+                "type": "directory" if item.is_dir() else "file",
+                "size": item.stat().st_size if item.is_file() else None
+            })
+
+        return {"files": files}
+
     async def handle_file_read(self, path: str) -> Dict[str, Any]:
         """Read a file"""
         try:
-            target = self.workspace_root / path.lstrip("/")
-            if not target.exists():
-                return {"error": f"File does not exist: {path}"}
-
-            content = target.read_text()
-            return {"content": content}
+            return await asyncio.to_thread(self._read_file, path)
         except Exception as e:
             return {"error": str(e)}
 
+    def _read_file(self, path: str) -> Dict[str, Any]:
+        target = self.workspace_root / path.lstrip("/")
+        if not target.exists():
+            return {"error": f"File does not exist: {path}"}
+
+        return {"content": target.read_text()}
+
     async def handle_file_write(self, path: str, content: str) -> Dict[str, Any]:
         """Write to a file"""
         try:
-            target = self.workspace_root / path.lstrip("/")
-            target.parent.mkdir(parents=True, exist_ok=True)
-            target.write_text(content)
+            await asyncio.to_thread(self._write_file, path, content)
             return {"status": "success", "path": str(path)}
         except Exception as e:
             return {"error": str(e)}
 
+    def _write_file(self, path: str, content: str) -> None:
+        target = self.workspace_root / path.lstrip("/")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+        # Writes below the root do not touch its mtime
+        self._context_cache = (None, 0.0, "")
+
     async def handle_exec(self, command: str) -> Dict[str, Any]:
         """Execute a shell command"""
         try:
             print(f"[Exec] {command}")
-            result = subprocess.run(
+            # Run without blocking the event loop so other clients keep being served
+            proc = await asyncio.create_subprocess_shell(
                 command,
-                shell=True,
-                cwd=self.workspace_root,
-                capture_output=True,
-                text=True,
-                timeout=30
+                cwd=str(self.workspace_root),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True
             )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=30)
+            except asyncio.TimeoutError:
+                self._kill_process_group(proc)
+                await proc.wait()
+                return {"error": "Command timeout after 30 seconds"}
+            except asyncio.CancelledError:
+                # Client went away mid-command; don't leave the process running
+                self._kill_process_group(proc)
+                raise
 
             return {
-                "stdout": result.stdout,
-                "stderr": result.stderr,
-                "returncode": result.returncode
+                "stdout": stdout.decode(errors="replace"),
+                "stderr": stderr.decode(errors="replace"),
+                "returncode": proc.returncode
             }
-        except subprocess.TimeoutExpired:
-            return {"error": "Command timeout after 30 seconds"}
         except Exception as e:
             return {"error": str(e)}
 
-    async def handle_rpc_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle a JSON-RPC 2.0 request"""
+    @staticmethod
+    def _kill_process_group(proc: asyncio.subprocess.Process):
+        """Kill the shell and anything it spawned (it leads its own session)"""
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    async def handle_rpc_request(self, request: Dict[str, Any],
+                                 notify: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """
+        Handle a JSON-RPC 2.0 request
+
+        notify(method, params) sends JSON-RPC notifications ahead of the
+        response, e.g. agent.task.delta fragments while Claude is generating.
+        """
         method = request.get("method")
         params = request.get("params", {})
         request_id = request.get("id")
 
+        # Handlers take named arguments, so positional (array) params are rejected
+        if not isinstance(params, dict):
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {
+                    "code": -32602,
+                    "message": "Invalid params: expected an object"
+                }
+            }
+
         # Route to appropriate handler
         if method == "agent.task":
-            result = await self.handle_agent_task(params.get("task", ""))
+            async def forward_delta(text: str) -> None:
+                await notify("agent.task.delta", {"id": request_id, "text": text})
+            on_delta = forward_delta if notify is not None else None
+            result = await self.handle_agent_task(params.get("task", ""), on_delta)
         elif method == "file.list":
             result = await self.handle_file_list(params.get("path", "/workspace"))
         elif method == "file.read":
@@ -228,6 +436,12 @@ async def startup():
     print(f"   Claude model: claude-3-5-sonnet-20241022")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    if agent_server is not None:
+        await agent_server.client.close()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -238,29 +452,120 @@ async def root():
     }
 
 
+def invalid_request_error() -> Dict[str, Any]:
+    """JSON-RPC -32600 error for a message that isn't a valid request"""
+    return {
+        "jsonrpc": "2.0",
+        "id": None,
+        "error": {
+            "code": -32600,
+            "message": "Invalid Request"
+        }
+    }
+
+
+def internal_error(request_id: Any, exc: BaseException) -> Dict[str, Any]:
+    """JSON-RPC -32603 error for a request whose handler raised"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {
+            "code": -32603,
+            "message": f"Internal error: {exc}"
+        }
+    }
+
+
+def log_task_failure(task: asyncio.Task) -> None:
+    """Done-callback reporting a request task that died with an exception"""
+    if not task.cancelled() and task.exception() is not None:
+        print(f"❌ Request task failed: {task.exception()!r}")
+
+
+async def iter_frames(websocket: WebSocket) -> AsyncIterator[Tuple[Union[str, bytes], bool]]:
+    """Yield (payload, is_binary) per frame until the client disconnects.
+
+    Like Starlette's iter_text()/iter_bytes(), but accepts both frame types.
+    """
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        data = message.get("bytes")
+        if data is not None:
+            yield data, True
+        else:
+            yield message.get("text", ""), False
+
+
 @app.websocket("/websocket")
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for JSON-RPC 2.0 communication"""
     await websocket.accept()
     print(f"🔌 Client connected: {websocket.client}")
 
-    try:
-        while True:
-            # Receive JSON-RPC request
-            data = await websocket.receive_text()
+    # Requests run concurrently; the lock keeps their frames from interleaving
+    send_lock = asyncio.Lock()
+    pending: Set[asyncio.Task] = set()
+
+    async def send(payload: Union[Dict[str, Any], List[Dict[str, Any]]], binary: bool) -> None:
+        # Binary clients get orjson's UTF-8 bytes as-is; text clients keep text frames
+        data = orjson.dumps(payload)
+        async with send_lock:
+            if binary:
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data.decode())
+
+    async def safe_handle(request: Dict[str, Any], notify: Callable[[str, Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        # A failing handler still owes the client a response for its id
+        try:
+            return await agent_server.handle_rpc_request(request, notify)
+        except Exception as e:
+            print(f"❌ Handler error for {request.get('method')} (id={request.get('id')}): {e!r}")
+            return internal_error(request.get("id"), e)
+
+    async def dispatch(request: Any, binary: bool) -> None:
+        async def notify(method: str, params: Dict[str, Any]) -> None:
+            await send({"jsonrpc": "2.0", "method": method, "params": params}, binary)
+
+        # Handle request
+        response = await safe_handle(request, notify)
+
+        # Send response
+        await send(response, binary)
+        print(f"📤 Response sent (id={response.get('id')})")
+
+    async def dispatch_batch(requests: List[Any], binary: bool) -> None:
+        # An empty batch is itself an invalid request, answered with one error object
+        if not requests:
+            await send(invalid_request_error(), binary)
+            return
+
+        async def notify(method: str, params: Dict[str, Any]) -> None:
+            await send({"jsonrpc": "2.0", "method": method, "params": params}, binary)
+
+        async def answer(request: Any) -> Optional[Dict[str, Any]]:
+            # Members are validated one by one; notifications run but get no response
+            if not isinstance(request, dict):
+                return invalid_request_error()
+            # A failing member becomes an error object in the array, not a lost batch
+            response = await safe_handle(request, notify)
+            return response if "id" in request else None
+
+        # A JSON-RPC batch is answered with a single array frame, or nothing if
+        # every member was a notification
+        responses = [r for r in await asyncio.gather(*(answer(r) for r in requests)) if r is not None]
+        if responses:
+            await send(responses, binary)
+        print(f"📤 Batch response sent ({len(responses)} results)")
 
+    try:
+        # Receive JSON-RPC requests, replying in the same frame type
+        async for data, binary in iter_frames(websocket):
             try:
-                request = json.loads(data)
-                print(f"📥 Request: {request.get('method')} (id={request.get('id')})")
-
-                # Handle request
-                response = await agent_server.handle_rpc_request(request)
-
-                # Send response
-                await websocket.send_text(json.dumps(response))
-                print(f"📤 Response sent (id={response.get('id')})")
-
-            except json.JSONDecodeError:
+                request = orjson.loads(data)
+            except orjson.JSONDecodeError:
                 # Invalid JSON
                 error_response = {
                     "jsonrpc": "2.0",
@@ -270,10 +575,28 @@ async def websocket_endpoint(websocket: WebSocket):
                         "message": "Parse error: Invalid JSON"
                     }
                 }
-                await websocket.send_text(json.dumps(error_response))
+                await send(error_response, binary)
+                continue
 
-    except WebSocketDisconnect:
-        print(f"👋 Client disconnected: {websocket.client}")
+            if isinstance(request, list):
+                print(f"📥 Batch: {len(request)} requests")
+                task = asyncio.create_task(dispatch_batch(request, binary))
+            elif isinstance(request, dict):
+                print(f"📥 Request: {request.get('method')} (id={request.get('id')})")
+                task = asyncio.create_task(dispatch(request, binary))
+            else:
+                # Neither a request object nor a batch
+                await send(invalid_request_error(), binary)
+                continue
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            task.add_done_callback(log_task_failure)
+    finally:
+        # Don't leave handlers running for a client that has gone
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    print(f"👋 Client disconnected: {websocket.client}")
 
 
 if __name__ == "__main__":
@@ -283,12 +606,19 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=35697, help="Port to listen on")
     parser.add_argument("--workspace", default="/workspace", help="Workspace root directory")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes sharing the listening socket (default: 1). "
+                             "Caches are per worker, so more workers means lower hit rates")
 
     args = parser.parse_args()
 
     # Set workspace root
     os.environ["WORKSPACE_ROOT"] = args.workspace
 
+    # C event loop and HTTP parser when available (uvicorn[standard])
+    loop = "uvloop" if sys.platform != "win32" and importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
     print("=" * 70)
     print("🚀 Starting Lightweight Agent RPC Server")
     print("=" * 70)
@@ -296,12 +626,20 @@ if __name__ == "__main__":
     print(f"   Port: {args.port}")
     print(f"   Workspace: {args.workspace}")
     print(f"   WebSocket URL: ws://{args.host}:{args.port}/websocket")
+    print(f"   Event loop: {loop}, HTTP parser: {http}")
+    print(f"   Workers: {args.workers}")
     print("=" * 70)
     print()
 
+    # Each worker builds its own LightweightAgentServer (and caches) in startup()
     uvicorn.run(
-        app,
+        "lightweight_agent_server:app",
+        workers=args.workers,
         host=args.host,
         port=args.port,
-        log_level="info"
+        log_level="info",
+        loop=loop,
+        http=http,
+        # Small local RPC frames; see module docstring
+        ws_per_message_deflate=False
     )
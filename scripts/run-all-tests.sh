@@ -26,9 +26,59 @@ run_test() {
     fi
 }
 
+# Run every test_*.py in a directory. With --parallel the scripts run
+# concurrently (each is a separate process with its own ports and temp paths),
+# so a category takes as long as its slowest test instead of the sum.
+# Database and docker tests share daemons and containers, so they always run
+# one at a time whatever the flag says.
+run_category() {
+    local category_dir=$1
+    local parallel=$PARALLEL
+    local pids=()
+    local names=()
+
+    case "$(basename "$category_dir")" in
+        *-databases|*-docker)
+            if [ "$parallel" = true ]; then
+                echo "  (shared daemons: running this category sequentially)"
+            fi
+            parallel=false
+            ;;
+    esac
+
+    for test_script in "$category_dir"/test_*.py; do
+        if [ -f "$test_script" ]; then
+            # Not ((TOTAL++)): it returns 1 when TOTAL is 0, which trips set -e
+            TOTAL=$((TOTAL + 1))
+            if [ "$parallel" = true ]; then
+                local test_name=$(basename "$test_script" .py)
+                run_test "$test_script" > "${OUTPUT_DIR}/${test_name}.log" 2>&1 &
+                pids+=($!)
+                names+=("$test_name")
+            elif run_test "$test_script"; then
+                PASSED=$((PASSED + 1))
+            else
+                FAILED=$((FAILED + 1))
+            fi
+        fi
+    done
+
+    # Collect parallel runs in start order
+    for i in "${!pids[@]}"; do
+        if wait "${pids[$i]}"; then
+            echo "  ✓ PASSED: ${names[$i]}"
+            PASSED=$((PASSED + 1))
+        else
+            echo "  ✗ FAILED: ${names[$i]} (log: ${OUTPUT_DIR}/${names[$i]}.log)"
+            FAILED=$((FAILED + 1))
+        fi
+    done
+}
+
 # Parse arguments
 CATEGORY=""
 RUN_ALL=false
+PARALLEL=false
 OUTPUT_FILE=""
 
 while [[ $# -gt 0 ]]; do
@@ -41,13 +91,17 @@ while [[ $# -gt 0 ]]; do
             RUN_ALL=true
             shift
             ;;
+        --parallel)
+            PARALLEL=true
+            shift
+            ;;
         --output)
             OUTPUT_FILE="$2"
             shift 2
             ;;
         *)
             echo "Unknown option: $1"
-            echo "Usage: $0 [--category <category>] [--all] [--output <file>]"
+            echo "Usage: $0 [--category <category>] [--all] [--parallel] [--output <file>]"
             exit 1
             ;;
     esac
@@ -75,16 +129,7 @@ if [ "$RUN_ALL" = true ]; then
             echo "Category: $category_name"
             echo "----------------------------"
 
-            for test_script in "$category_dir"test_*.py; do
-                if [ -f "$test_script" ]; then
-                    ((TOTAL++))
-                    if run_test "$test_script"; then
-                        ((PASSED++))
-                    else
-                        ((FAILED++))
-                    fi
-                fi
-            done
+            run_category "${category_dir%/}"
         fi
     done
 elif [ -n "$CATEGORY" ]; then
@@ -134,18 +179,9 @@ elif [ -n "$CATEGORY" ]; then
         exit 1
     fi
 
-    for test_script in "$CATEGORY_DIR"/test_*.py; do
-        if [ -f "$test_script" ]; then
-            ((TOTAL++))
-            if run_test "$test_script"; then
-                ((PASSED++))
-            else
-                ((FAILED++))
-            fi
-        fi
-    done
+    run_category "$CATEGORY_DIR"
 else
-    echo "Error: Specify --all or --category <name>"
+    echo "Error: Specify --all or --category <name> (optionally with --parallel)"
     echo "Available categories: environment, languages, git, mcp, agents, databases, docker, secrets, grazie, ai"
     exit 1
 fi
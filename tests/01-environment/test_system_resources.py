@@ -14,6 +14,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from common.test_framework import BaseTest, main_template
 
+# Prime psutil's CPU counters so run() can read usage without sleeping
+psutil.cpu_percent(interval=None)
+
 
 class SystemResourcesTest(BaseTest):
     """Test system resources availability."""
@@ -28,7 +31,8 @@ class SystemResourcesTest(BaseTest):
         # CPU information
         try:
             cpu_count = psutil.cpu_count()
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Usage since import; informational only, the check is on cpu_count
+            cpu_percent = psutil.cpu_percent(interval=None)
 
             self.result.add_check(
                 name="cpu_available",
@@ -88,42 +92,14 @@ class SystemResourcesTest(BaseTest):
                 error=f"Could not check disk: {str(e)}"
             )
 
-        # Check /tmp writability
-        try:
-            test_file = Path("/tmp/resource_test.txt")
-            test_file.write_text("test")
-            content = test_file.read_text()
-            test_file.unlink()
-
-            self.result.add_check(
-                name="tmp_writable",
-                passed=content == "test",
-                output="/tmp directory is writable"
-            )
-        except Exception as e:
-            self.result.add_check(
-                name="tmp_writable",
-                passed=False,
-                error=f"Cannot write to /tmp: {str(e)}"
-            )
-
-        # Check /workspace writability
-        try:
-            test_file = Path("/workspace/resource_test.txt")
-            test_file.write_text("test")
-            content = test_file.read_text()
-            test_file.unlink()
-
+        # Check /tmp and /workspace writability (access(2) also reports read-only mounts)
+        for dir_path, check_name in [("/tmp", "tmp_writable"), ("/workspace", "workspace_writable")]:
+            writable = os.access(dir_path, os.W_OK)
             self.result.add_check(
-                name="workspace_writable",
-                passed=content == "test",
-                output="/workspace directory is writable"
-            )
-        except Exception as e:
-            self.result.add_check(
-                name="workspace_writable",
-                passed=False,
-                error=f"Cannot write to /workspace: {str(e)}"
+                name=check_name,
+                passed=writable,
+                output=f"{dir_path} directory is writable" if writable else None,
+                error=f"Cannot write to {dir_path}" if not writable else None
             )
 
         return self.result
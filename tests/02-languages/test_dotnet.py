@@ -4,6 +4,7 @@
 Validates .NET SDK, project creation, and build.
 """
 
+import os
 import sys
 import subprocess
 from pathlib import Path
@@ -45,6 +46,14 @@ class DotNetTest(BaseTest):
         """Test .NET project creation, build, and run."""
         temp_dir = None
 
+        # Keep MSBuild warm between new/build/run and skip first-run banners/telemetry
+        env = {
+            **os.environ,
+            "DOTNET_CLI_USE_MSBUILD_SERVER": "1",
+            "DOTNET_NOLOGO": "1",
+            "DOTNET_CLI_TELEMETRY_OPTOUT": "1",
+        }
+
         try:
             # Create temporary directory
             temp_dir = Path(tempfile.mkdtemp(prefix="dotnet_test_"))
@@ -53,6 +62,7 @@ class DotNetTest(BaseTest):
             new_result = subprocess.run(
                 ["dotnet", "new", "console", "-n", "HelloApp", "-o", "HelloApp"],
                 cwd=temp_dir,
+                env=env,
                 capture_output=True,
                 text=True,
                 timeout=60
@@ -98,6 +108,7 @@ namespace HelloApp
             build_result = subprocess.run(
                 ["dotnet", "build"],
                 cwd=project_dir,
+                env=env,
                 capture_output=True,
                 text=True,
                 timeout=120
@@ -115,10 +126,11 @@ namespace HelloApp
             if not success:
                 return
 
-            # Run the project
+            # Run the project (already built above)
             run_result = subprocess.run(
-                ["dotnet", "run"],
+                ["dotnet", "run", "--no-build"],
                 cwd=project_dir,
+                env=env,
                 capture_output=True,
                 text=True,
                 timeout=60
@@ -141,6 +153,18 @@ namespace HelloApp
                 error=f"Error during .NET test: {str(e)}"
             )
         finally:
+            # The MSBuild server outlives the test; stop it so no node lingers
+            if temp_dir:
+                try:
+                    subprocess.run(
+                        ["dotnet", "build-server", "shutdown"],
+                        env=env,
+                        capture_output=True,
+                        timeout=30
+                    )
+                except (OSError, subprocess.SubprocessError):
+                    pass
+
             # Cleanup
             if temp_dir and temp_dir.exists():
                 shutil.rmtree(temp_dir, ignore_errors=True)
@@ -5,127 +5,33 @@ Validates Node.js, npm, and real-world Express API development workflow.
 Creates an Express API, writes Jest tests, and validates functionality.
 """
 
+import http.client
+import os
+import re
 import sys
 import subprocess
-import time
 import json
+from concurrent.futures import Future
 from pathlib import Path
+from typing import Optional
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from common.test_framework import BaseTest, main_template
-
-
-class JavaScriptTest(BaseTest):
-    """Test JavaScript/Node.js development tools with realistic workflow."""
-
-    def __init__(self):
-        super().__init__("javascript_express_api")
-        self.work_dir = Path("/tmp/js_test_app")
-
-    def run(self):
-        """Run comprehensive Node.js development workflow."""
-        print("Testing JavaScript/Node.js development environment with Express API...")
-
-        # Phase 1: Check basic tools
-        self.check_command_exists("node", "Node.js")
-        success, version = self.check_version("node")
-        if success:
-            self.result.set_metadata("node_version", version.strip())
-
-        self.check_command_exists("npm", "npm")
-        success, version = self.check_version("npm")
-        if success:
-            self.result.set_metadata("npm_version", version.strip())
-
-        self.check_command_exists("npx", "npx")
-
-        # Phase 2: Create project and install dependencies
-        self.create_project()
-        self.install_dependencies()
-
-        # Phase 3: Create Express application
-        self.create_express_app()
-
-        # Phase 4: Create Jest test suite
-        self.create_test_suite()
-
-        # Phase 5: Run tests
-        self.run_tests()
-
-        # Phase 6: Start server and test endpoints
-        self.test_api_endpoints()
-
-        # Cleanup
-        self.cleanup()
-
-        return self.result
-
-    def create_project(self):
-        """Create package.json for the project."""
-        print("Creating Node.js project...")
-
-        self.work_dir.mkdir(parents=True, exist_ok=True)
-
-        package_json = {
-            "name": "test-express-api",
-            "version": "1.0.0",
-            "description": "Test Express API for validation",
-            "main": "server.js",
-            "scripts": {
-                "test": "jest --verbose",
-                "start": "node server.js"
-            },
-            "dependencies": {},
-            "devDependencies": {}
-        }
-
-        package_file = self.work_dir / "package.json"
-        try:
-            package_file.write_text(json.dumps(package_json, indent=2))
-            self.result.add_check(
-                name="create_package_json",
-                passed=True,
-                output=f"Created {package_file}"
-            )
-        except Exception as e:
-            self.result.add_check(
-                name="create_package_json",
-                passed=False,
-                error=str(e)
-            )
-
-    def install_dependencies(self):
-        """Install Express and Jest from npm."""
-        print("Installing Express, Jest, and Supertest...")
-
-        def install():
-            cmd = f"cd {self.work_dir} && npm install express jest supertest"
-            success, output, error = self.run_command(cmd, timeout=180)
-            return success, output, error
-
-        (success, output, error), duration = self.measure_time(
-            "npm_install_time",
-            install
-        )
-
-        self.result.add_check(
-            name="npm_install_dependencies",
-            passed=success,
-            output=f"Installed in {duration:.2f}s",
-            error=error if not success else None
-        )
-
-        if success:
-            # Verify node_modules exists
-            node_modules = self.work_dir / "node_modules"
-            if node_modules.exists():
-                self.result.add_validation("node_modules_created", True)
-
-    def create_express_app(self):
-        """Create a realistic Express REST API."""
-        print("Creating Express application...")
-
-        server_code = '''/**
+from common.test_framework import BaseTest, atomic_write_bytes, discard_dir, main_template
+
+# npm dependencies live in this persistent project, reused across runs and
+# linked into each run's work dir as node_modules
+_NODE_DEPS_DIR = Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "devcontainer-tests" / "node-deps"
+_NODE_DEPS = ["express", "jest", "supertest"]
+
+# Jest's summary line, e.g. "Tests:       1 failed, 8 passed, 9 total"
+_JEST_SUMMARY_RE = re.compile(
+    r'^Tests:\s+(?:(?P<failed>\d+) failed, )?(?:(?P<skipped>\d+) skipped, )?(?:(?P<todo>\d+) todo, )?'
+    r'(?:(?P<passed>\d+) passed, )?(?P<total>\d+) total',
+    re.MULTILINE
+)
+
+# Express REST API written to server.js
+_SERVER_JS = b'''/**
  * Express REST API for testing
  * Provides endpoints for product management
  */
@@ -223,27 +129,8 @@ if (require.main === module) {
 module.exports = app;
 '''
 
-        server_file = self.work_dir / "server.js"
-        try:
-            server_file.write_text(server_code)
-            self.result.add_check(
-                name="create_express_app",
-                passed=True,
-                output=f"Created {server_file}"
-            )
-            self.result.add_validation("server_file", str(server_file))
-        except Exception as e:
-            self.result.add_check(
-                name="create_express_app",
-                passed=False,
-                error=str(e)
-            )
-
-    def create_test_suite(self):
-        """Create Jest test suite for the Express API."""
-        print("Creating Jest test suite...")
-
-        test_code = '''/**
+# Jest + supertest suite for the API, written to server.test.js
+_SERVER_TEST_JS = b'''/**
  * Test suite for Express product API
  */
 const request = require('supertest');
@@ -340,9 +227,160 @@ describe('Product API Tests', () => {
 });
 '''
 
+
+class JavaScriptTest(BaseTest):
+    """Test JavaScript/Node.js development tools with realistic workflow."""
+
+    def __init__(self):
+        super().__init__("javascript_express_api")
+        self.work_dir = Path("/tmp/js_test_app")
+
+    def run(self):
+        """Run comprehensive Node.js development workflow."""
+        print("Testing JavaScript/Node.js development environment with Express API...")
+
+        # Phase 1: Check basic tools
+        success, version = self.check_tool("node", "Node.js")
+        if success:
+            self.result.set_metadata("node_version", version.strip())
+
+        success, version = self.check_tool("npm", "npm")
+        if success:
+            self.result.set_metadata("npm_version", version.strip())
+
+        self.check_command_exists("npx", "npx")
+
+        # Phase 2: Create project and start installing dependencies
+        self.create_project()
+        install = self._start_install()
+
+        # Phase 3: Create Express application (only writes files, so it overlaps npm)
+        self.create_express_app()
+
+        # Phase 4: Create Jest test suite
+        self.create_test_suite()
+
+        # Everything after this needs node_modules
+        self.install_dependencies(install)
+
+        # Start the server now so node's startup overlaps the Jest run
+        try:
+            server_process = self._start_server()
+        except OSError:
+            # test_api_endpoints tries again and reports the error
+            server_process = None
+
+        # Phase 5: Run tests
+        self.run_tests()
+
+        # Phase 6: Test endpoints on the server started above
+        self.test_api_endpoints(server_process)
+
+        # Cleanup
+        self.cleanup()
+
+        return self.result
+
+    def create_project(self):
+        """Create package.json for the project."""
+        print("Creating Node.js project...")
+
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        package_json = {
+            "name": "test-express-api",
+            "version": "1.0.0",
+            "description": "Test Express API for validation",
+            "main": "server.js",
+            "scripts": {
+                "test": "jest --verbose --runInBand",
+                "start": "node server.js"
+            },
+            "dependencies": {},
+            "devDependencies": {}
+        }
+
+        package_file = self.work_dir / "package.json"
+        try:
+            package_file.write_text(json.dumps(package_json, indent=2))
+            self.result.add_check(
+                name="create_package_json",
+                passed=True,
+                output=f"Created {package_file}"
+            )
+        except Exception as e:
+            self.result.add_check(
+                name="create_package_json",
+                passed=False,
+                error=str(e)
+            )
+
+    def _start_install(self) -> Future:
+        """Start npm install in the background; the future is collected by install_dependencies."""
+        print("Installing Express, Jest, and Supertest...")
+
+        _NODE_DEPS_DIR.mkdir(parents=True, exist_ok=True)
+        deps_package = _NODE_DEPS_DIR / "package.json"
+        if not deps_package.exists():
+            deps_package.write_text(json.dumps({"name": "devcontainer-test-deps", "private": True}, indent=2))
+
+        # On warm runs npm finds the tree already matching package-lock.json;
+        # --prefer-offline answers registry lookups from npm's own cache.
+        # Only errors are printed; they are all the check reports.
+        cmd = (f"cd {_NODE_DEPS_DIR} && npm install --prefer-offline --no-audit --no-fund "
+               f"--ignore-scripts --no-progress --loglevel=error {' '.join(_NODE_DEPS)}")
+        return self.run_in_background(cmd, timeout=180)
+
+    def install_dependencies(self, install: Optional[Future] = None):
+        """Install Express and Jest from npm, collecting an install already started by run."""
+        install = install or self._start_install()
+        (success, output, error), duration = install.result()
+        self.result.add_performance_metric("npm_install_time", round(duration, 2))
+
+        node_modules = self.work_dir / "node_modules"
+        if success and not os.path.lexists(node_modules):
+            node_modules.symlink_to(_NODE_DEPS_DIR / "node_modules", target_is_directory=True)
+
+        self.result.add_check(
+            name="npm_install_dependencies",
+            passed=success,
+            output=f"Installed in {duration:.2f}s",
+            error=error if not success else None
+        )
+
+        if success:
+            # Verify node_modules exists
+            node_modules = self.work_dir / "node_modules"
+            if node_modules.exists():
+                self.result.add_validation("node_modules_created", True)
+
+    def create_express_app(self):
+        """Create a realistic Express REST API."""
+        print("Creating Express application...")
+
+        server_file = self.work_dir / "server.js"
+        try:
+            atomic_write_bytes(server_file, _SERVER_JS)
+            self.result.add_check(
+                name="create_express_app",
+                passed=True,
+                output=f"Created {server_file}"
+            )
+            self.result.add_validation("server_file", str(server_file))
+        except Exception as e:
+            self.result.add_check(
+                name="create_express_app",
+                passed=False,
+                error=str(e)
+            )
+
+    def create_test_suite(self):
+        """Create Jest test suite for the Express API."""
+        print("Creating Jest test suite...")
+
         test_file = self.work_dir / "server.test.js"
         try:
-            test_file.write_text(test_code)
+            atomic_write_bytes(test_file, _SERVER_TEST_JS)
             self.result.add_check(
                 name="create_test_suite",
                 passed=True,
@@ -361,7 +399,10 @@ describe('Product API Tests', () => {
         print("Running Jest tests...")
 
         def run_jest():
-            cmd = f"cd {self.work_dir} && npm test"
+            # Call jest directly rather than through npm test's extra node process;
+            # one suite, so run it in-process instead of starting a worker pool
+            cmd = (f"cd {self.work_dir} && ./node_modules/.bin/jest --verbose --runInBand "
+                   f"--no-coverage server.test.js")
             success, output, error = self.run_command(cmd, timeout=60)
             return success, output, error
 
@@ -375,18 +416,12 @@ describe('Product API Tests', () => {
         pass_rate = "0/0"
 
         combined_output = output + error
-        if "Tests:" in combined_output or "passed" in combined_output:
-            if "failed" not in combined_output.lower() or ("passed" in combined_output and "9 passed" in combined_output):
-                test_passed = True
-                # Extract pass count
-                import re
-                match = re.search(r'Tests:\s+(\d+)\s+passed', combined_output)
-                if match:
-                    passed_count = match.group(1)
-                    pass_rate = f"{passed_count}/9"
-                elif "9 passed" in combined_output:
-                    pass_rate = "9/9"
-                    test_passed = True
+        match = _JEST_SUMMARY_RE.search(combined_output)
+        if match:
+            failed = int(match.group("failed") or 0)
+            passed = int(match.group("passed") or 0)
+            test_passed = failed == 0 and passed > 0
+            pass_rate = f"{passed}/{match.group('total')}"
 
         self.result.add_check(
             name="jest_tests",
@@ -406,40 +441,47 @@ describe('Product API Tests', () => {
             ]
             self.validate_output(combined_output, patterns, "jest_output_validation")
 
-    def test_api_endpoints(self):
-        """Start Express server and test HTTP endpoints."""
+    def _start_server(self) -> subprocess.Popen:
+        """Launch node server.js without waiting for it; test_api_endpoints probes and stops it."""
+        return subprocess.Popen(
+            ["node", "server.js"],
+            cwd=self.work_dir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+
+    def test_api_endpoints(self, server_process: Optional[subprocess.Popen] = None):
+        """Test HTTP endpoints on the Express server, starting it if run hasn't already."""
         print("Testing API endpoints...")
 
-        server_process = None
         try:
-            cmd = f"cd {self.work_dir} && node server.js"
-            server_process = subprocess.Popen(
-                cmd,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-
-            # Wait for server to start
-            if self.wait_for_service("127.0.0.1", 3000, timeout=15, service_name="express_api"):
-
-                # Small delay to ensure server is ready
-                time.sleep(0.5)
-
-                # Test health endpoint
-                success, status = self.check_http_endpoint(
-                    "http://127.0.0.1:3000/health",
-                    expected_status=200,
-                    name="health_endpoint"
-                )
-
-                # Test products endpoint
-                success, status = self.check_http_endpoint(
-                    "http://127.0.0.1:3000/api/products",
-                    expected_status=200,
-                    name="products_endpoint"
-                )
+            if server_process is None:
+                server_process = self._start_server()
+
+            # server.js logs this from its listen callback, once the port is bound
+            if self.wait_for_output(server_process, "Server running on port", timeout=15,
+                                    service_name="express_api"):
+                # Both probes share one keep-alive connection
+                conn = http.client.HTTPConnection("127.0.0.1", 3000, timeout=5)
+                try:
+                    # Test health endpoint
+                    success, status = self.check_http_endpoint(
+                        "/health",
+                        expected_status=200,
+                        name="health_endpoint",
+                        connection=conn
+                    )
+
+                    # Test products endpoint
+                    success, status = self.check_http_endpoint(
+                        "/api/products",
+                        expected_status=200,
+                        name="products_endpoint",
+                        connection=conn
+                    )
+                finally:
+                    conn.close()
 
                 self.result.add_validation("api_endpoints_tested", 2)
             else:
@@ -468,8 +510,7 @@ describe('Product API Tests', () => {
         """Clean up test files."""
         try:
             if self.work_dir.exists():
-                import shutil
-                shutil.rmtree(self.work_dir)
+                discard_dir(self.work_dir)
         except Exception:
             pass  # Best effort cleanup
 
@@ -13,7 +13,7 @@ from pathlib import Path
 # Add parent directory to path to import common utilities
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from common.test_framework import BaseTest, main_template
+from common.test_framework import BaseTest, discard_dir, main_template
 
 
 class PythonTest(BaseTest):
@@ -418,8 +418,7 @@ def test_update_nonexistent_user(client):
         """Clean up test files."""
         try:
             if self.work_dir.exists():
-                import shutil
-                shutil.rmtree(self.work_dir)
+                discard_dir(self.work_dir)
         except Exception:
             pass  # Best effort cleanup
 
@@ -4,12 +4,21 @@ Common test framework utilities for devcontainer testing.
 Provides base classes and utilities for all test categories.
 """
 
+import functools
+import http.client
 import json
+import os
+import shutil
 import sys
 import subprocess
 import time
 import socket
 import re
+import select
+import signal
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Any, List, Tuple, Optional, Callable
 from datetime import datetime
@@ -17,6 +26,87 @@ from urllib.request import urlopen
 from urllib.error import URLError
 
 
+@functools.lru_cache(maxsize=None)
+def _which(command: str) -> Optional[str]:
+    """PATH lookup done in-process, cached since PATH doesn't change during a run."""
+    return shutil.which(command)
+
+
+def run_captured(args: List[str], timeout: int, **kwargs) -> subprocess.CompletedProcess:
+    """
+    subprocess.run with text stdout/stderr captured, for short-lived tools.
+
+    CPython only takes its posix_spawn fast path when close_fds is off and the
+    executable is a path, so the tool is resolved on PATH first. Leaving fds open
+    is safe since Python creates them non-inheritable (PEP 446).
+    """
+    return subprocess.run(
+        args,
+        executable=_which(args[0]) or args[0],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        close_fds=False,
+        **kwargs
+    )
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Write data to path via a temp file and rename, so readers never see a partial file."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+# Trees handed to discard_dir are moved here and deleted off the measured path
+_TRASH_DIR = Path("/tmp/.devcontainer_test_trash")
+_trash_lock = threading.Lock()
+_trash_sweeper: Optional[threading.Thread] = None
+
+
+def _sweep_trash():
+    """Keep emptying the trash dir; runs in a daemon thread."""
+    while True:
+        try:
+            for entry in _TRASH_DIR.iterdir():
+                shutil.rmtree(entry, ignore_errors=True)
+        except OSError:
+            pass
+        time.sleep(1)
+
+
+def discard_dir(path: Path):
+    """
+    Remove a directory tree without waiting for the delete.
+
+    The tree is renamed into a trash dir and removed by a background thread;
+    anything still there at exit is swept by the next run that discards a dir.
+    Falls back to a synchronous rmtree when the rename isn't possible.
+    """
+    global _trash_sweeper
+    try:
+        _TRASH_DIR.mkdir(exist_ok=True)
+        os.replace(path, _TRASH_DIR / f"{os.getpid()}-{time.time_ns()}")
+    except OSError:
+        shutil.rmtree(path, ignore_errors=True)
+        return
+
+    with _trash_lock:
+        if _trash_sweeper is None:
+            _trash_sweeper = threading.Thread(target=_sweep_trash, daemon=True)
+            _trash_sweeper.start()
+
+
+def _drain_fd(fd: int):
+    """Read and discard a pipe until EOF; runs in a daemon thread."""
+    try:
+        while os.read(fd, 65536):
+            pass
+    except OSError:
+        # The owner closed the pipe first
+        pass
+
+
 class TestResult:
     """Represents the result of a test execution."""
 
@@ -86,7 +176,8 @@ class BaseTest:
         self.test_type = test_type
         self.result = TestResult(test_type)
 
-    def run_command(self, cmd: str, check: bool = True, timeout: int = 300) -> Tuple[bool, str, str]:
+    def run_command(self, cmd: str, check: bool = True, timeout: int = 300,
+                    env: Optional[Dict[str, str]] = None) -> Tuple[bool, str, str]:
         """
         Run a shell command and return success status, stdout, and stderr.
 
@@ -94,17 +185,21 @@ class BaseTest:
             cmd: Command to execute
             check: If True, only check if command succeeds. If False, return full output.
             timeout: Command timeout in seconds (default: 300s for long-running builds)
+            env: Environment for the command (default: inherit the current one)
 
         Returns:
             Tuple of (success, stdout, stderr)
         """
         try:
+            # close_fds=False lets /bin/sh be started via posix_spawn (see run_captured)
             result = subprocess.run(
                 cmd,
                 shell=True,
                 capture_output=True,
                 text=True,
-                timeout=timeout
+                timeout=timeout,
+                env=env,
+                close_fds=False
             )
             return result.returncode == 0, result.stdout.strip(), result.stderr.strip()
         except subprocess.TimeoutExpired:
@@ -112,17 +207,106 @@ class BaseTest:
         except Exception as e:
             return False, "", str(e)
 
+    def run_in_background(self, cmd: str, timeout: int = 300,
+                          env: Optional[Dict[str, str]] = None) -> Future:
+        """
+        Start run_command on a background thread and return immediately.
+
+        Only the command runs off the main thread; record checks when collecting
+        the future, so TestResult is never touched concurrently.
+
+        Returns:
+            Future yielding ((success, stdout, stderr), duration in seconds)
+        """
+        def run():
+            start_time = time.time()
+            result = self.run_command(cmd, timeout=timeout, env=env)
+            return result, time.time() - start_time
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            return executor.submit(run)
+        finally:
+            executor.shutdown(wait=False)
+
+    def stream_command(self, cmd: str, on_line: Callable[[str], None], timeout: int = 300,
+                       env: Optional[Dict[str, str]] = None, tail_lines: int = 50) -> Tuple[bool, str]:
+        """
+        Run a shell command, passing each line of its merged stdout/stderr to on_line.
+
+        Use instead of run_command for verbose tools (e.g. go test -v) whose output
+        only needs to be scanned: lines are handled as they arrive and only the
+        last tail_lines are kept, for error reporting.
+
+        Args:
+            cmd: Command to execute
+            on_line: Called with each output line, without the trailing newline
+            timeout: Command timeout in seconds
+            env: Environment for the command (default: inherit the current one)
+            tail_lines: Number of trailing lines to return
+
+        Returns:
+            Tuple of (success, last lines of output)
+        """
+        tail = deque(maxlen=tail_lines)
+        try:
+            process = subprocess.Popen(
+                cmd,
+                shell=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                env=env,
+                start_new_session=True
+            )
+        except Exception as e:
+            return False, str(e)
+
+        timed_out = threading.Event()
+
+        def expire():
+            # Kill the whole group so children holding the pipe open exit too
+            timed_out.set()
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        timer = threading.Timer(timeout, expire)
+        timer.start()
+        try:
+            with process.stdout:
+                for line in process.stdout:
+                    line = line.rstrip("\n")
+                    tail.append(line)
+                    on_line(line)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+
+        if timed_out.is_set():
+            return False, f"Command timed out after {timeout}s"
+        return returncode == 0, "\n".join(tail)
+
     def check_command_exists(self, command: str, name: Optional[str] = None) -> bool:
         """Check if a command exists in PATH."""
-        check_name = name or command
-        success, output, error = self.run_command(f"command -v {command}")
+        path = _which(command)
         self.result.add_check(
-            name=f"{check_name}_installed",
-            passed=success,
-            output=output if success else None,
-            error=error if not success else None
+            name=f"{name or command}_installed",
+            passed=path is not None,
+            output=path,
+            error=f"{command} not found in PATH" if path is None else None
         )
-        return success
+        return path is not None
+
+    def check_commands_exist(self, commands: List[Tuple[str, Optional[str]]]) -> List[bool]:
+        """
+        Check several (command, name) pairs, recording checks in the given order.
+
+        Returns:
+            List of booleans, one per command
+        """
+        return [self.check_command_exists(command, name) for command, name in commands]
 
     def check_version(self, command: str, name: Optional[str] = None) -> Tuple[bool, str]:
         """Check command version."""
@@ -142,6 +326,48 @@ class BaseTest:
         )
         return success, version_output
 
+    def check_tool(self, command: str, name: Optional[str] = None,
+                   version_args: Tuple[str, ...] = ("--version",)) -> Tuple[bool, str]:
+        """
+        Check that a tool is installed and record its version.
+
+        Records the same {name}_installed and {command}_version checks as
+        check_command_exists + check_version, but runs only the one version
+        command the tool understands, and none at all when it isn't on PATH.
+
+        Args:
+            command: Executable to look up
+            name: Display name for the installed check
+            version_args: Arguments that make the tool print its version
+
+        Returns:
+            Tuple of (success, version output)
+        """
+        if not self.check_command_exists(command, name):
+            self.result.add_check(
+                name=f"{command}_version",
+                passed=False,
+                error=f"{command} not found in PATH"
+            )
+            return False, ""
+
+        try:
+            result = run_captured([command, *version_args], timeout=30)
+        except Exception as e:
+            self.result.add_check(name=f"{command}_version", passed=False, error=str(e)[:200])
+            return False, ""
+
+        success = result.returncode == 0
+        # Some tools (java -version) print their version on stderr
+        version_output = (result.stdout.strip() or result.stderr.strip()) if success else result.stderr.strip()
+        self.result.add_check(
+            name=f"{command}_version",
+            passed=success,
+            output=version_output[:200] if version_output else None,
+            error=version_output[:200] if not success else None
+        )
+        return success, version_output
+
     def check_file_exists(self, file_path: str, name: Optional[str] = None) -> bool:
         """Check if a file or directory exists."""
         check_name = name or f"file_{Path(file_path).name}"
@@ -206,15 +432,17 @@ class BaseTest:
         return all_matched
 
     def check_http_endpoint(self, url: str, expected_status: int = 200,
-                           timeout: int = 10, name: Optional[str] = None) -> Tuple[bool, Optional[int]]:
+                           timeout: int = 10, name: Optional[str] = None,
+                           connection: Optional[http.client.HTTPConnection] = None) -> Tuple[bool, Optional[int]]:
         """
         Test HTTP endpoint availability and status.
 
         Args:
-            url: URL to test
+            url: URL to test, or just the request path when connection is given
             expected_status: Expected HTTP status code
             timeout: Request timeout in seconds
             name: Name for the check
+            connection: Keep-alive connection to reuse across several probes of one server
 
         Returns:
             Tuple of (success, actual_status_code)
@@ -222,8 +450,23 @@ class BaseTest:
         check_name = name or f"http_endpoint_{url}"
 
         try:
-            response = urlopen(url, timeout=timeout)
-            status_code = response.getcode()
+            if connection is not None:
+                # This probe's timeout applies, whatever the connection was built with
+                connection.timeout = timeout
+                if connection.sock is not None:
+                    connection.sock.settimeout(timeout)
+                try:
+                    connection.request("GET", url)
+                    response = connection.getresponse()
+                    response.read()
+                except Exception:
+                    # Leave the connection closed so the next probe reconnects
+                    connection.close()
+                    raise
+                status_code = response.status
+            else:
+                response = urlopen(url, timeout=timeout)
+                status_code = response.getcode()
             success = status_code == expected_status
 
             self.result.add_check(
@@ -342,6 +585,67 @@ class BaseTest:
         )
         return False
 
+    def wait_for_output(self, process: subprocess.Popen, marker: str, timeout: int = 30,
+                        service_name: Optional[str] = None) -> bool:
+        """
+        Wait for a process started with stdout=PIPE to print marker.
+
+        Unlike wait_for_service this does not poll: it returns as soon as the
+        process reports it is ready, e.g. right after binding its socket.
+        Once the marker is seen, the rest of stdout is drained and discarded
+        in the background so a chatty process can't block on a full pipe;
+        stderr, if piped, is left to the caller.
+
+        Args:
+            process: Process whose stdout is a pipe
+            marker: Text the process prints once it is ready
+            timeout: Maximum time to wait in seconds
+            service_name: Name of the service for check reporting
+
+        Returns:
+            True if the marker was seen, False on timeout or process exit
+        """
+        check_name = service_name or f"process_{process.pid}"
+        start_time = time.time()
+        deadline = start_time + timeout
+        # Read the pipe's fd directly: select() can't see data already pulled
+        # into a file object's buffer, so readline() could miss a ready marker
+        fd = process.stdout.fileno()
+        expected = marker.encode()
+        seen = b""
+
+        while True:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                error = f"Service not ready after {timeout}s"
+                break
+            readable, _, _ = select.select([fd], [], [], remaining)
+            if not readable:
+                continue
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                error = "Process exited before becoming ready"
+                break
+            # Only a marker split across reads needs earlier bytes
+            seen = seen[-len(expected):] + chunk
+            if expected in seen:
+                threading.Thread(target=_drain_fd, args=(fd,), daemon=True).start()
+                wait_time = round(time.time() - start_time, 2)
+                self.result.add_check(
+                    name=f"{check_name}_ready",
+                    passed=True,
+                    output=f"Service ready after {wait_time}s"
+                )
+                self.result.add_performance_metric(f"{check_name}_startup_time", wait_time)
+                return True
+
+        self.result.add_check(
+            name=f"{check_name}_ready",
+            passed=False,
+            error=error
+        )
+        return False
+
     def run(self) -> TestResult:
         """Run the test. Must be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement run()")